@@ -61,7 +61,7 @@ if ($LASTEXITCODE -ne 0) {
 & $NssmPath set $ServiceName AppDirectory "$ProjectRoot"
 & $NssmPath set $ServiceName AppStdout "$StdoutLog"
 & $NssmPath set $ServiceName AppStderr "$StderrLog"
-& $NssmPath set $ServiceName AppEnvironmentExtra "ILLUMIO_CHECK_INTERVAL=300"
+& $NssmPath set $ServiceName AppEnvironmentExtra "ILLUMIO_AUDIT_INTERVAL=3600" "ILLUMIO_EVENTS_INTERVAL=60"
 & $NssmPath set $ServiceName Description "Illumio Rule Scheduler background daemon for evaluating temporary policy schedules."
 
 Write-Host "Starting Service..." -ForegroundColor Yellow
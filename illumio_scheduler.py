@@ -1,6 +1,5 @@
 import os
 import sys
-import time
 import argparse
 
 # ==========================================
@@ -8,9 +7,11 @@ import argparse
 # ==========================================
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_FILE = os.path.join(SCRIPT_DIR, "rule_schedules.json")
+SQLITE_DB_FILE = os.path.join(SCRIPT_DIR, "rule_schedules.db")
 CONFIG_FILE = os.path.join(SCRIPT_DIR, "config.json")
+NAME_CACHE_FILE = os.path.join(SCRIPT_DIR, "name_cache.json")
 
-from src.core import ConfigManager, ScheduleDB, PCEClient, ScheduleEngine
+from src.core import ConfigManager, ScheduleDB, SQLiteScheduleDB, JournaledScheduleDB, PCEClient, ScheduleEngine, ScheduleDaemon
 
 def init_core() -> dict:
     """Initialize core dependencies (Config, DB, PCE, Runtime Engine)"""
@@ -20,11 +21,28 @@ def init_core() -> dict:
     import src.i18n as i18n
     i18n.set_lang(cfg.config.get('lang', 'en'))
 
-    db = ScheduleDB(DB_FILE)
-    pce = PCEClient(cfg)
+    backend = cfg.config.get('db_backend')
+    if backend == 'sqlite':
+        # Existing JSON schedules are imported on first start
+        db = SQLiteScheduleDB(SQLITE_DB_FILE, migrate_from=DB_FILE)
+    elif backend == 'journal':
+        # Uses rule_schedules.json as its snapshot, so existing schedules carry over
+        db = JournaledScheduleDB(DB_FILE)
+    else:
+        db = ScheduleDB(DB_FILE)
+    pce = PCEClient(cfg, cache_path=NAME_CACHE_FILE)
     engine = ScheduleEngine(db, pce)
     return {'cfg': cfg, 'db': db, 'pce': pce, 'engine': engine}
 
+def build_daemon(core_system) -> ScheduleDaemon:
+    """Schedule daemon for --monitor, or embedded in the --gui process with --scheduler"""
+    # Full drift audit interval; schedule boundaries are handled exactly.
+    # ILLUMIO_CHECK_INTERVAL is still honoured for older service definitions.
+    audit = int(os.environ.get("ILLUMIO_AUDIT_INTERVAL", os.environ.get("ILLUMIO_CHECK_INTERVAL", "3600")))
+    # PCE events feed poll interval (0 disables out-of-band change detection)
+    events = int(os.environ.get("ILLUMIO_EVENTS_INTERVAL", "60"))
+    return ScheduleDaemon(core_system['engine'], audit_interval=audit, events_interval=events)
+
 def resolve_port(args, core_system):
     # Port resolution priority:
     # 1. CLI Argument (--port) if not 5000
@@ -56,27 +74,47 @@ if __name__ == "__main__":
     parser.add_argument("--gui", action="store_true", help="Launch the Web GUI mode")
     parser.add_argument("--port", type=int, default=5000, help="Port for the Web GUI (default: 5000)")
     parser.add_argument("--monitor", action="store_true", help="Run in continuous background daemon mode")
+    parser.add_argument("--scheduler", action="store_true",
+                        help="With --gui: also run the schedule engine inside the GUI process (replaces a separate --monitor)")
+    parser.add_argument("--import", dest="import_file", metavar="FILE",
+                        help="Bulk create/replace schedules from a CSV or JSON file, then exit")
+    parser.add_argument("--dry-run", action="store_true", help="With --import: validate only, change nothing")
     
     args = parser.parse_args()
     
     core_system = init_core()
     selected_port = resolve_port(args, core_system)
 
-    if args.monitor:
+    if args.import_file:
+        from src.bulk import iter_import_rows, import_schedules
+        with open(args.import_file, encoding="utf-8-sig", newline="") as f:
+            fmt = "csv" if args.import_file.lower().endswith(".csv") else None
+            summary = import_schedules(core_system['db'], core_system['pce'], iter_import_rows(f, fmt),
+                                       dry_run=args.dry_run)
+        for err in summary['errors']:
+            print(f"[-] Row {err['row']} {err['href']}: {err['error']}")
+        for res in summary['results']:
+            if res.get('note') is False:
+                print(f"[!] ID {res['id']}: schedule saved, description note / provision failed")
+        verb = "valid (dry run)" if args.dry_run else "imported"
+        print(f"[*] {summary['valid']} schedule(s) {verb}, {len(summary['errors'])} rejected.")
+        sys.exit(1 if summary['errors'] else 0)
+
+    elif args.monitor:
         print("[*] Service Started (Daemon mode).")
-        interval = int(os.environ.get("ILLUMIO_CHECK_INTERVAL", "300"))
-        while True:
-            try:
-                core_system['engine'].check(silent=True)
-            except Exception as e:
-                import traceback
-                print(f"[DAEMON ERROR] {e}")
-                traceback.print_exc()
-            time.sleep(interval)
+        daemon = build_daemon(core_system)
+        try:
+            daemon.run_forever()
+        except KeyboardInterrupt:
+            daemon.stop()
 
     elif args.gui:
         try:
             from src.gui_ui import launch_gui
+            if args.scheduler:
+                # Shares the GUI's PCE client, caches and DB; edits wake it immediately
+                core_system['daemon'] = build_daemon(core_system)
+                print("[*] Schedule engine running inside the Web GUI process.")
             print(f"[*] Starting Web GUI on port {selected_port}")
             launch_gui(core_system, port=selected_port)
         except ImportError:
@@ -0,0 +1,212 @@
+"""
+Bulk schedule operations shared by the Web GUI and the command line.
+
+A bulk import validates rows one by one as they are read (CSV or JSON), writes
+every valid schedule to the DB in one batch, applies the description notes as
+parallel draft PUTs and provisions the affected RuleSets once. Bulk delete
+strips the notes the same way before removing the schedules in one write.
+"""
+import csv
+import itertools
+import json
+from datetime import datetime
+
+from src.core import ScheduleEngine, extract_id, truncate
+import src.i18n as i18n
+
+IMPORT_FIELDS = ('href', 'schedule_type', 'action', 'days', 'start', 'end', 'expire_at', 'name')
+
+
+def build_schedule(d):
+    """Validate one schedule request and return (db_entry, note_msg).
+
+    `d` uses the /api/schedules POST fields; raises ValueError when invalid.
+    """
+    db_entry = {
+        'name': d.get('name', ''),
+        'is_ruleset': d.get('is_ruleset', False),
+        'detail_rs': d.get('detail_rs', ''),
+        'detail_src': d.get('detail_src', 'All'),
+        'detail_dst': d.get('detail_dst', 'All'),
+        'detail_svc': d.get('detail_svc', 'All'),
+        'detail_name': d.get('name', ''),
+        'detail_src_full': d.get('detail_src_full', d.get('detail_src', 'All')),
+        'detail_dst_full': d.get('detail_dst_full', d.get('detail_dst', 'All')),
+        'detail_svc_full': d.get('detail_svc_full', d.get('detail_svc', 'All')),
+    }
+
+    if d.get('schedule_type') == 'recurring':
+        days = d.get('days', '')
+        if isinstance(days, str):
+            days = [x.strip() for x in days.replace(';', ',').split(',') if x.strip()]
+        if not days or any(x[:3].lower() not in ScheduleEngine.DAY_MAP for x in days):
+            raise ValueError(f"invalid days: {d.get('days')!r}")
+        if d.get('action', 'allow') not in ('allow', 'block'):
+            raise ValueError(f"invalid action: {d.get('action')!r}")
+        t1 = datetime.strptime(d.get('start', ''), '%H:%M')
+        t2 = datetime.strptime(d.get('end', ''), '%H:%M')
+        if t1 >= t2:
+            raise ValueError(i18n.t('sch_time_invalid'))
+
+        db_entry.update({
+            'type': 'recurring',
+            'action': d.get('action', 'allow'),
+            'days': days,
+            # Zero-padded, as the engine compares "%H:%M" strings ('8:00' -> '08:00')
+            'start': t1.strftime('%H:%M'),
+            'end': t2.strftime('%H:%M'),
+        })
+        act_str = i18n.t('action_enable_in_window') if db_entry['action'] == 'allow' else i18n.t('action_disable_in_window')
+        days_str = i18n.t('action_everyday') if len(days) == 7 else ','.join([dx[:3] for dx in days])
+        note_msg = f"[📅 {i18n.t('sch_tag_recurring')}: {days_str} {db_entry['start']}-{db_entry['end']} {act_str}]"
+    elif d.get('schedule_type') in ('one_time', None, ''):
+        # Local wall-clock time, like the engine's datetime.now() it is compared with
+        ex = (d.get('expire_at') or '').replace(' ', 'T').rstrip('Z')
+        if len(ex) == 16: ex += ":00"
+        datetime.fromisoformat(ex)
+        db_entry.update({'type': 'one_time', 'action': 'allow', 'expire_at': ex})
+        note_msg = f"[⏳ {i18n.t('sch_tag_expire')}: {d.get('expire_at')}]"
+    else:
+        raise ValueError(f"invalid schedule_type: {d.get('schedule_type')!r}")
+    return db_entry, note_msg
+
+
+def iter_import_rows(fp, fmt=None):
+    """Yield (row_number, row) from a CSV or JSON text stream.
+
+    JSON may be JSON Lines (one object per line, read incrementally), an array,
+    or an object with an "items" array. CSV uses IMPORT_FIELDS as its header;
+    multiple days may be separated with ';'. Unparseable JSON lines are yielded
+    as the ValueError so they are reported with their row number.
+    """
+    first = ''
+    for first in fp:
+        if first.strip():
+            break
+    lines = itertools.chain([first], fp)
+    if fmt is None:
+        fmt = 'json' if first.lstrip()[:1] in ('[', '{') else 'csv'
+
+    if fmt == 'csv':
+        for n, row in enumerate(csv.DictReader(lines), 2):
+            yield n, {k.strip(): (v or '').strip() for k, v in row.items() if k}
+        return
+
+    try:
+        head = json.loads(first)
+        whole = first.lstrip().startswith('[')
+    except ValueError:
+        head, whole = None, True
+    if isinstance(head, dict) and isinstance(head.get('items'), list):
+        # A one-line {"items": [...]} document, not the first of several JSON Lines
+        yield from enumerate(head['items'], 1)
+        return
+    if whole:
+        data = json.loads(''.join(lines))
+        yield from enumerate(data['items'] if isinstance(data, dict) else data, 1)
+        return
+    for n, line in enumerate(lines, 1):
+        if line.strip():
+            try:
+                yield n, json.loads(line)
+            except ValueError as e:
+                yield n, e
+
+
+def validate_import(rows, pce):
+    """Validate import rows as they are read. Returns (accepted, errors).
+
+    accepted: [(href, db_entry, note_msg)]; errors: [{'row', 'href', 'error'}].
+    Targets must be provisioned, like schedules added interactively (checked
+    against one live snapshot). Display fields not given in the row are filled
+    from the live PCE objects.
+    """
+    accepted, errors, seen = [], [], set()
+    for n, row in rows:
+        href = row.get('href', '') if isinstance(row, dict) else ''
+        try:
+            if isinstance(row, ValueError):
+                raise row
+            if not isinstance(row, dict):
+                raise ValueError(f"not an object: {row!r}")
+            if not href.startswith('/orgs/') or '/rule_sets/' not in href:
+                raise ValueError(f"invalid href: {href!r}")
+            href = href.replace('/active/', '/draft/')
+            if href in seen:
+                raise ValueError("duplicate href in import")
+            seen.add(href)
+            db_entry, note_msg = build_schedule(row)
+        except ValueError as e:
+            errors.append({'row': n, 'href': href, 'error': str(e)})
+            continue
+        accepted.append((n, href, row, db_entry, note_msg))
+
+    snapshot = pce.get_live_snapshot([a[1] for a in accepted]) if accepted else None
+    if accepted and snapshot is None:
+        return [], errors + [{'row': n, 'href': h, 'error': 'PCE unreachable'} for n, h, *_ in accepted]
+
+    valid = []
+    for n, href, row, db_entry, note_msg in accepted:
+        live = snapshot.active.get(href)
+        if live is None:
+            errors.append({'row': n, 'href': href,
+                           'error': 'not found or not provisioned (draft-only rules cannot be scheduled)'})
+            continue
+        is_rs = '/sec_rules/' not in href
+        rs = live if is_rs else snapshot.get(pce.parent_ruleset_href(href)) or {}
+        name = row.get('name') or (rs.get('name', '') if is_rs else live.get('description') or f"Rule {extract_id(href)}")
+        db_entry.update({'is_ruleset': is_rs, 'name': name, 'detail_name': name,
+                         'detail_rs': row.get('detail_rs') or rs.get('name', '')})
+        if not is_rs:
+            resolved = {
+                'src': pce.resolve_actor_str(live.get('destinations', live.get('consumers', []))),
+                'dst': pce.resolve_actor_str(live.get('providers', [])),
+                'svc': pce.resolve_service_str(live.get('ingress_services', [])),
+            }
+            for k, full in resolved.items():
+                if not row.get(f'detail_{k}'):
+                    db_entry[f'detail_{k}'] = truncate(full, 25 if k == 'svc' else 30)
+                    db_entry[f'detail_{k}_full'] = full
+        valid.append((href, db_entry, note_msg))
+    errors.sort(key=lambda e: e['row'])
+    return valid, errors
+
+
+def import_schedules(db, pce, rows, actor=None, dry_run=False):
+    """Validate and apply a bulk import.
+
+    Valid rows are saved in one DB write, their notes applied by parallel draft
+    PUTs and the affected RuleSets provisioned together. Invalid rows are
+    reported and skipped. Returns a summary dict with per-row results.
+    """
+    accepted, errors = validate_import(rows, pce)
+    existing = db.get_all()
+    results = [{'href': h, 'id': extract_id(h), 'replaced': h in existing} for h, _, _ in accepted]
+    if accepted and not dry_run:
+        with db.acting_as(actor), db.batch():
+            for href, db_entry, _ in accepted:
+                db.put(href, db_entry)
+        notes = pce.update_rule_notes({href: note for href, _, note in accepted})
+        for r in results:
+            r['note'] = notes[r['href']]
+    return {'imported': 0 if dry_run else len(accepted), 'valid': len(accepted),
+            'errors': errors, 'results': results, 'dry_run': dry_run}
+
+
+def delete_schedules(db, pce, hrefs, actor=None):
+    """Delete many schedules: strip their notes from the drafts in parallel,
+    provision the affected RuleSets once, then remove them in one DB write.
+
+    Schedules are removed even when their note could not be stripped (as
+    before), which is reported per item. Returns a list of
+    {'href', 'id', 'deleted', 'note'} in input order.
+    """
+    hrefs = list(hrefs)
+    existing = db.get_all()
+    found = [h for h in dict.fromkeys(hrefs) if h in existing]
+    notes = pce.update_rule_notes({h: '' for h in found}, remove=True) if found else {}
+    with db.acting_as(actor), db.batch():
+        for href in found:
+            db.delete(href)
+    return [{'href': h, 'id': extract_id(h), 'deleted': h in notes, 'note': notes.get(h, False)}
+            for h in hrefs]
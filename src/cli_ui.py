@@ -2,6 +2,7 @@ import sys
 import getpass
 import time
 from src.core import Colors, truncate, extract_id
+from src.bulk import delete_schedules
 from src.i18n import t, set_lang, get_lang
 
 def clean_input(text):
@@ -251,7 +252,7 @@ class CLI:
             
             # Show inline commands
             print(f"\n  {Colors.BOLD}{t('sch_hint')}: {Colors.YELLOW}★{Colors.RESET}={t('sch_hint_rs')}, {Colors.CYAN}●{Colors.RESET}={t('sch_hint_child')}")
-            print(f"  {Colors.GREEN}a{Colors.RESET}={t('sch_browse')}  |  {Colors.CYAN}e <ID>{Colors.RESET}={t('sch_edit')}  |  {Colors.RED}d <ID,ID,...>{Colors.RESET}={t('sch_delete')}  |  r=Refresh  |  q={t('sch_back')}")
+            print(f"  {Colors.GREEN}a{Colors.RESET}={t('sch_browse')}  |  {Colors.CYAN}e <ID>{Colors.RESET}={t('sch_edit')}  |  {Colors.RED}d <ID,ID,...>{Colors.RESET}={t('sch_delete')}  |  h [ID]={t('sch_history')}  |  r=Refresh  |  q={t('sch_back')}")
             
             ans = clean_input(input(">> ")).strip()
             if ans.lower() in ['q', 'b', '']: return
@@ -261,6 +262,8 @@ class CLI:
                     self._browse_and_add()
                 elif ans.lower() == 'r':
                     continue  # will re-render the list
+                elif ans.lower() == 'h' or ans.lower().startswith('h '):
+                    self._show_history(ans[2:].strip())
                 elif ans.lower().startswith('e '):
                     # Edit: e <ID>
                     edit_id = ans[2:].strip()
@@ -486,6 +489,10 @@ class CLI:
             if conf.get('is_ruleset'): groups[rs_name]['rs_config'] = entry_data
             else: groups[rs_name]['rules'].append(entry_data)
                 
+        # One bulk rule_sets fetch instead of a GET per scheduled item
+        snapshot = self.pce.get_live_snapshot(list(db_data.keys()))
+        live_state = self.pce.lookup_live_many(db_data.keys(), snapshot)
+
         print("\n" + "="*145)
         print(f"{t('hdr_sch'):<3} | {t('hdr_id'):<6} | {'Type':<6} | {t('hdr_note'):<25} | {t('hdr_source'):<12} | {t('hdr_dest'):<12} | {t('hdr_service'):<16} | {t('list_mode'):<10} | {t('list_timing')}")
         print("-" * 145)
@@ -499,12 +506,12 @@ class CLI:
                 rid = Colors.id(f"{extract_id(h):<6}")
                 mark = f"{Colors.YELLOW}★{Colors.RESET}"
                 
-                live_res = self.pce.get_live_item(h)
-                if live_res and live_res.status_code == 200:
-                    live_name = live_res.json().get('name', c['name'])
+                live, reachable = live_state[h]
+                if live is not None:
+                    live_name = live.get('name', c['name'])
                     raw_name = truncate(f"[RS] {live_name}", 25)
                     display_name = f"{Colors.BOLD}{raw_name:<25}{Colors.RESET}"
-                elif live_res is None:
+                elif not reachable:
                     raw_name = truncate(f"[RS] {c.get('name', rs_name)} (Failed)", 25)
                     display_name = f"{Colors.YELLOW}{raw_name:<25}{Colors.RESET}"
                 else:
@@ -531,9 +538,8 @@ class CLI:
                 rid = Colors.id(f"{extract_id(h):<6}")
                 mark = f"{Colors.CYAN}●{Colors.RESET}"
                 
-                live_res = self.pce.get_live_item(h)
-                if live_res and live_res.status_code == 200:
-                    r_obj = live_res.json()
+                r_obj, reachable = live_state[h]
+                if r_obj is not None:
                     dest_field = r_obj.get('destinations', r_obj.get('consumers', []))
                     src = truncate(self.pce.resolve_actor_str(dest_field), 12)
                     dst = truncate(self.pce.resolve_actor_str(r_obj.get('providers', [])), 12)
@@ -553,7 +559,7 @@ class CLI:
                         
                     raw_name = truncate(f" └─ {desc}", 25)
                     display_name = f"{Colors.GREY}{raw_name:<25}{Colors.RESET}"
-                elif live_res is None:
+                elif not reachable:
                     type_str = f"{Colors.YELLOW}{'Wait':<6}{Colors.RESET}"
                     src = dst = svc = "-"
                     raw_name = truncate(f" └─ (Failed connection)", 25)
@@ -581,7 +587,7 @@ class CLI:
     # ── Edit by ID ──
     def _edit_by_id(self, edit_id):
         db_data = self.db.get_all()
-        found = [x for x in db_data if extract_id(x) == edit_id]
+        found = self.db.hrefs_for_id(edit_id)
         if not found:
             return print(f"{Colors.RED}[-] {t('edit_not_found')}{Colors.RESET}")
         
@@ -605,6 +611,24 @@ class CLI:
         self.pce.update_rule_note(href, note_msg)
         print(f"\n{Colors.GREEN}[+] {t('sch_updated')} (ID: {extract_id(href)}){Colors.RESET}")
 
+    # ── Change history (journal backend) ──
+    def _show_history(self, id_str, limit=50):
+        if not hasattr(self.db, 'history'):
+            print(f"{Colors.YELLOW}[!] {t('history_unavailable')}{Colors.RESET}")
+            input(t('press_enter'))
+            return
+        records = self.db.history()
+        if id_str:
+            records = [r for r in records if extract_id(r.get('href', '')) == id_str]
+        print(f"\n{Colors.HEADER}--- {t('history_title')} ---{Colors.RESET}")
+        if not records:
+            print(f"  {t('history_empty')}")
+        for r in records[-limit:]:
+            data = r.get('data') or {}
+            op = f"{Colors.GREEN}PUT{Colors.RESET}   " if r.get('op') == 'put' else f"{Colors.RED}DELETE{Colors.RESET}"
+            print(f"  {r.get('ts', ''):<19} | {op} | {extract_id(r.get('href', '')):<6} | {r.get('by', ''):<24} | {data.get('detail_name', data.get('name', ''))}")
+        input(t('press_enter'))
+
     # ── Delete by IDs (multi-delete) ──
     def _delete_by_ids(self, ids_str):
         db_data = self.db.get_all()
@@ -612,7 +636,7 @@ class CLI:
         
         to_delete = []
         for k in ids:
-            found = [x for x in db_data if extract_id(x) == k]
+            found = self.db.hrefs_for_id(k)
             if found:
                 href = found[0]
                 conf = db_data[href]
@@ -627,12 +651,14 @@ class CLI:
         if clean_input(input(f"\n  {t('delete_confirm')} ({len(to_delete)} items) ")).lower() != 'y':
             return
         
-        for href, conf, k in to_delete:
-            try:
-                self.pce.update_rule_note(href, "", remove=True)
-            except Exception: pass
-            self.db.delete(href)
+        results = delete_schedules(self.db, self.pce, [href for href, conf, k in to_delete])
+        for (href, conf, k), res in zip(to_delete, results):
+            if not res['deleted']:
+                print(f"  {Colors.RED}[-] ID {k}: {t('delete_not_found')}{Colors.RESET}")
+                continue
             print(f"  {Colors.GREEN}[OK] ID {k} {t('delete_done')}{Colors.RESET}")
+            if not res['note']:
+                print(f"  {Colors.YELLOW}[!] ID {k}: {t('delete_note_failed')}{Colors.RESET}")
 
     # ==========================================
     # Main Menu
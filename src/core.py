@@ -1,17 +1,34 @@
 """
 Illumio Rule Scheduler — Core Engine (Zero External Dependencies)
-All API calls use Python stdlib: urllib.request, http.client, ssl, base64
+All API calls use Python stdlib: http.client (keep-alive pool), ssl, base64
 """
 import os
 import json
 import datetime
+import time
 import re
-import urllib.request
-import urllib.error
+import urllib.parse
+import http.client
 import ssl
 import base64
+import codecs
+import collections
+import contextlib
+import getpass
+import heapq
+import socket
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple, Union
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
 # ==========================================
 # 0. Color Engine & Formatters (Shared)
 # ==========================================
@@ -62,6 +79,29 @@ def truncate(text, width):
 def extract_id(href): 
     return href.split('/')[-1] if href else ""
 
+_ANSI_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+def strip_ansi(text):
+    return _ANSI_RE.sub('', text)
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Exclusive advisory lock on `path` (created if missing), shared by all processes"""
+    with open(path, 'a+') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
 # ==========================================
 # 1. Config Manager
 # ==========================================
@@ -83,7 +123,9 @@ class ConfigManager:
         return False
 
     def save(self, url, org, key, secret, alert_mail=None, ssl_verify=None, smtp_host=None, smtp_port=None, smtp_auth=None):
-        data = {
+        # Start from the current config so optional tuning keys are preserved
+        data = dict(self.config)
+        data.update({
             "pce_url": url.rstrip("/"), 
             "org_id": org, 
             "api_key": key, 
@@ -94,7 +136,7 @@ class ConfigManager:
             "smtp_host": smtp_host if smtp_host is not None else self.config.get('smtp_host', ''),
             "smtp_port": smtp_port if smtp_port is not None else self.config.get('smtp_port', ''),
             "smtp_auth": smtp_auth if smtp_auth is not None else self.config.get('smtp_auth', True)
-        }
+        })
         with open(self.config_path, 'w', encoding='utf-8') as f: 
             json.dump(data, f, indent=4)
         self.config = data
@@ -121,56 +163,391 @@ class ConfigManager:
 # 2. Schedule Database
 # ==========================================
 class ScheduleDB:
-    """Manages the local JSON-based storage for configured rule schedules."""
+    """Manages the local JSON-based storage for configured rule schedules.
+
+    put() / delete() record pending changes that _flush() writes out; inside a
+    batch() block they are written once, when the outermost block exits.
+    In-memory indexes (short ID -> hrefs, RuleSet href -> scheduled child
+    hrefs) are kept in step with every load/put/delete.
+
+    The GUI and the --monitor daemon share the file: writes happen under an
+    advisory lock via temp file + rename, and get_all() re-reads the file
+    (at most once per RELOAD_CHECK_INTERVAL) only when its stat() changed.
+    """
+
+    RELOAD_CHECK_INTERVAL = 1.0
     
     def __init__(self, db_path: str):
         self.db_path: str = db_path
         self.db: Dict[str, Any] = {}
+        self._disk_stamp: Optional[Any] = None
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._batch_depth: int = 0
+        self._lock = threading.RLock()
+        self._by_id: Dict[str, set] = {}
+        self._children: Dict[str, set] = {}
+        self._checked_at: float = 0.0
+        self._actor = threading.local()
 
-    def load(self) -> Dict[str, Any]:
+    @contextlib.contextmanager
+    def acting_as(self, actor):
+        """Attribute the changes made by this thread to `actor` (recorded by the journaled backend)"""
+        previous = getattr(self._actor, 'name', None)
+        self._actor.name = actor
+        try:
+            yield self
+        finally:
+            self._actor.name = previous
+
+    def _stat_stamp(self) -> Optional[Any]:
+        try:
+            st = os.stat(self.db_path)
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return None
+
+    def reload_if_changed(self) -> bool:
+        """Reload when another process has rewritten the file. Returns True if reloaded."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            stamp = self._stat_stamp()
+            if stamp == self._disk_stamp:
+                return False
+            self.load()
+            return True
+
+    def _read(self) -> Dict[str, Any]:
         if os.path.exists(self.db_path):
             try:
                 with open(self.db_path, 'r', encoding='utf-8') as f: 
-                    self.db = json.load(f)
+                    return json.load(f)
             except Exception: 
-                self.db = {}
-        else:
-            self.db = {}
-        return self.db
+                pass
+        return {}
+
+    def load(self) -> Dict[str, Any]:
+        with self._lock:
+            self._disk_stamp = self._stat_stamp()
+            self.db = self._read()
+            self._reindex()
+            # Changes not yet written (inside a batch) survive a reload
+            for href, data in self._pending.items():
+                self._apply(href, data)
+            return self.db
 
     def save(self):
-        with open(self.db_path, 'w', encoding='utf-8') as f: 
+        """Atomically replace the file; readers see either the old or the new version"""
+        tmp_path = f"{self.db_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f: 
             json.dump(self.db, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(5):
+            try:
+                os.replace(tmp_path, self.db_path)
+                break
+            except PermissionError:
+                # Windows refuses the rename while another process has the file open
+                if attempt == 4:
+                    raise
+                time.sleep(0.1)
+        self._disk_stamp = self._stat_stamp()
+
+    def _flush(self, pending):
+        """Persist pending {href: data or None (deleted)} changes"""
+        with file_lock(f"{self.db_path}.lock"):
+            if self._stat_stamp() != self._disk_stamp:
+                # Another process wrote since our last read: apply our changes on top of its version
+                self.load()
+                for href, data in pending.items():
+                    self._apply(href, data)
+            self.save()
+
+    def _commit(self):
+        pending, self._pending = self._pending, {}
+        if pending:
+            self._flush(pending)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Group several put/delete calls into a single write"""
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._commit()
+
+    # ── Secondary indexes ──
+    def _reindex(self):
+        self._by_id, self._children = {}, {}
+        for href in self.db:
+            self._index_add(href)
+
+    def _index_add(self, href):
+        self._by_id.setdefault(extract_id(href), set()).add(href)
+        rs_href = PCEClient.parent_ruleset_href(href)
+        if rs_href != href:
+            self._children.setdefault(rs_href, set()).add(href)
+
+    @staticmethod
+    def _discard(index, key, href):
+        hrefs = index.get(key)
+        if hrefs is not None:
+            hrefs.discard(href)
+            if not hrefs:
+                del index[key]
+
+    def _index_remove(self, href):
+        self._discard(self._by_id, extract_id(href), href)
+        self._discard(self._children, PCEClient.parent_ruleset_href(href), href)
 
     def get_all(self):
         if not self.db:
             self.load()
+        elif not self._batch_depth and time.monotonic() - self._checked_at >= self.RELOAD_CHECK_INTERVAL:
+            self.reload_if_changed()
         return self.db
 
     def get(self, href):
         return self.get_all().get(href)
 
+    def _apply(self, href, data):
+        """Apply one change (data None = delete) to the in-memory copy and its indexes"""
+        if data is None:
+            if self.db.pop(href, None) is not None:
+                self._index_remove(href)
+        else:
+            if href not in self.db:
+                self._index_add(href)
+            self.db[href] = data
+
     def put(self, href, data):
-        self.get_all()[href] = data
-        self.save()
+        with self.batch():
+            self.get_all()
+            self._apply(href, data)
+            self._pending[href] = data
 
     def delete(self, href):
-        db = self.get_all()
-        if href in db:
-            del db[href]
-            self.save()
+        with self.batch():
+            if href not in self.get_all():
+                return False
+            self._apply(href, None)
+            self._pending[href] = None
             return True
-        return False
+
+    def hrefs_for_id(self, rule_id):
+        """Scheduled hrefs whose short ID (last path segment) is `rule_id`"""
+        self.get_all()
+        return sorted(self._by_id.get(str(rule_id), ()))
+
+    def children_of(self, rs_href):
+        """Scheduled rule hrefs that belong to the given RuleSet"""
+        self.get_all()
+        return sorted(self._children.get(rs_href, ()))
 
     def get_schedule_type(self, rs):
         """0=無排程, 1=規則集本身(Self), 2=內部規則有(Child)"""
-        db_keys = self.get_all().keys()
-        if rs['href'] in db_keys: 
+        if rs['href'] in self.get_all(): 
             return 1
-        for r in rs.get('rules', []):
-            if r['href'] in db_keys: 
-                return 2
-        return 0
+        return 2 if rs['href'] in self._children else 0
+
+
+class SQLiteScheduleDB(ScheduleDB):
+    """ScheduleDB stored in SQLite (`db_backend: sqlite`).
+
+    One row per schedule, indexed by rule ID, parent RuleSet and schedule type;
+    every batch() is written as a single transaction. The full set is still
+    mirrored in memory (with the same secondary indexes) for the engine's
+    per-pass scan and the UI lookups.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS schedules (
+            href    TEXT PRIMARY KEY,
+            rule_id TEXT NOT NULL,
+            rs_href TEXT NOT NULL,
+            type    TEXT,
+            data    TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_schedules_rule_id ON schedules (rule_id);
+        CREATE INDEX IF NOT EXISTS idx_schedules_rs_href ON schedules (rs_href);
+        CREATE INDEX IF NOT EXISTS idx_schedules_type ON schedules (type);
+    """
+
+    def __init__(self, db_path: str, migrate_from: Optional[str] = None):
+        super().__init__(db_path)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+        if migrate_from:
+            self.migrate_json(migrate_from)
+
+    def _stat_stamp(self) -> Optional[Any]:
+        # Changes whenever another connection (e.g. the other process) commits
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self) -> Dict[str, Any]:
+        with self._lock:
+            self._disk_stamp = self._stat_stamp()
+            rows = self._conn.execute("SELECT href, data FROM schedules").fetchall()
+            self.db = {href: json.loads(data) for href, data in rows}
+            self._reindex()
+            for href, data in self._pending.items():
+                self._apply(href, data)
+            return self.db
+
+    def save(self):
+        with self.batch():
+            self._pending.update(self.db)
+
+    @staticmethod
+    def _row(href, data):
+        return (href, extract_id(href), PCEClient.parent_ruleset_href(href), data.get('type'),
+                json.dumps(data, ensure_ascii=False))
+
+    def _flush(self, pending):
+        upserts = [self._row(h, d) for h, d in pending.items() if d is not None]
+        deletes = [(h,) for h, d in pending.items() if d is None]
+        with self._conn:
+            if upserts:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO schedules (href, rule_id, rs_href, type, data) VALUES (?, ?, ?, ?, ?)", upserts)
+            if deletes:
+                self._conn.executemany("DELETE FROM schedules WHERE href = ?", deletes)
+
+    def migrate_json(self, json_path):
+        """One-shot import of an existing rule_schedules.json into an empty database.
+        The JSON file is renamed to *.migrated afterwards. Returns the number of rows imported."""
+        if not os.path.exists(json_path):
+            return 0
+        with self._lock:
+            if self._conn.execute("SELECT COUNT(*) FROM schedules").fetchone()[0]:
+                return 0
+            data = ScheduleDB(json_path).load()
+            with self.batch():
+                self._pending.update(data)
+            os.replace(json_path, f"{json_path}.migrated")
+            self.load()
+        print(f"[*] Migrated {len(data)} schedules from {os.path.basename(json_path)} to SQLite.")
+        return len(data)
+
+
+class JournaledScheduleDB(ScheduleDB):
+    """ScheduleDB with an append-only journal (`db_backend: journal`).
+
+    rule_schedules.json stays the snapshot; every put/delete appends one JSON
+    line (time, op, href, data, actor) to rule_schedules.json.journal, so a write
+    costs O(1). Once the journal passes COMPACT_BYTES it is folded into the
+    snapshot on a background thread and archived as *.journal.1, *.journal.2,
+    ... so the full who/what history is kept. Startup replays snapshot +
+    journal; a torn last line from a crash is ignored.
+    """
+
+    COMPACT_BYTES = 1024 * 1024
+
+    def __init__(self, db_path: str):
+        super().__init__(db_path)
+        self.journal_path: str = f"{db_path}.journal"
+        try:
+            user = getpass.getuser()
+        except Exception:
+            user = str(os.getpid())
+        self.default_actor: str = f"{user}@{socket.gethostname()}"
+        self._compacting: Optional[threading.Thread] = None
+
+    def _stat_stamp(self) -> Optional[Any]:
+        stamps = []
+        for path in (self.db_path, self.journal_path):
+            try:
+                st = os.stat(path)
+                stamps.append((st.st_mtime_ns, st.st_size, st.st_ino))
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    @staticmethod
+    def _read_journal(path):
+        """Yield journal records, skipping lines torn by a crash mid-append"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if line.endswith('\n') and isinstance(rec, dict):
+                    yield rec
+
+    def _read(self) -> Dict[str, Any]:
+        db = super()._read()
+        for rec in self._read_journal(self.journal_path):
+            if rec.get('op') == 'delete':
+                db.pop(rec.get('href'), None)
+            elif rec.get('op') == 'put':
+                db[rec['href']] = rec.get('data')
+        return db
+
+    def _flush(self, pending):
+        actor = getattr(self._actor, 'name', None) or self.default_actor
+        ts = datetime.datetime.now().isoformat(timespec='seconds')
+        lines = "".join(json.dumps({'ts': ts, 'op': 'put' if data is not None else 'delete', 'href': href,
+                                    'data': data, 'by': actor}, ensure_ascii=False, separators=(',', ':')) + "\n"
+                        for href, data in pending.items())
+        with file_lock(f"{self.db_path}.lock"):
+            if self._stat_stamp() != self._disk_stamp:
+                self.load()
+                for href, data in pending.items():
+                    self._apply(href, data)
+            with open(self.journal_path, 'a+b') as f:
+                # Start on a fresh line if a previous append was torn by a crash
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        lines = "\n" + lines
+                f.write(lines.encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            self._disk_stamp = self._stat_stamp()
+            journal_size = self._disk_stamp[1][1] if self._disk_stamp[1] else 0
+        if journal_size > self.COMPACT_BYTES and not (self._compacting and self._compacting.is_alive()):
+            self._compacting = threading.Thread(target=self.compact, name="schedule-db-compact", daemon=True)
+            self._compacting.start()
+
+    def _archives(self):
+        """Archived journal generations as [(number, path)], oldest first"""
+        folder = os.path.dirname(self.journal_path) or '.'
+        prefix = os.path.basename(self.journal_path) + '.'
+        found = []
+        for name in os.listdir(folder):
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                found.append((int(name[len(prefix):]), os.path.join(folder, name)))
+        return sorted(found)
+
+    def compact(self):
+        """Fold the journal into the snapshot and archive it as the next *.journal.N"""
+        with self._lock, file_lock(f"{self.db_path}.lock"):
+            if self._stat_stamp() != self._disk_stamp:
+                self.load()
+            if not os.path.exists(self.journal_path):
+                return
+            self.save()
+            # A crash before this rename only means the journal is replayed onto a snapshot
+            # that already contains it, which yields the same state
+            archives = self._archives()
+            os.replace(self.journal_path, f"{self.journal_path}.{archives[-1][0] + 1 if archives else 1}")
+            self._disk_stamp = self._stat_stamp()
+
+    def history(self, href=None):
+        """Journal records (oldest first) from every archived generation and the current one"""
+        records = []
+        for path in [p for _, p in self._archives()] + [self.journal_path]:
+            records.extend(r for r in self._read_journal(path) if href is None or r.get('href') == href)
+        return records
 
 # ==========================================
 # 3. HTTP Response Wrapper (replaces requests.Response)
@@ -178,9 +555,10 @@ class ScheduleDB:
 class APIResponse:
     """Lightweight HTTP response wrapper mimicking the requests.Response object interface."""
     
-    def __init__(self, status_code: int, body: bytes = b''):
+    def __init__(self, status_code: int, body: bytes = b'', headers: Optional[Any] = None):
         self.status_code: int = status_code
         self._body: bytes = body
+        self.headers: Any = headers if headers is not None else {}  # case-insensitive http.client headers
     
     def json(self):
         try:
@@ -194,20 +572,428 @@ class APIResponse:
     def text(self):
         return self._body.decode('utf-8', errors='replace')
 
+
+def iter_json_array(stream, chunk_size: int = 65536):
+    """Yield the elements of a top-level JSON array read incrementally from `stream`.
+
+    Only the element being decoded plus one read chunk is held in memory, so a
+    200 MB rule_sets dump never exists as one bytes/str/object graph at once.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf, pos, eof = '', 0, False
+
+    def read_more(at_least):
+        nonlocal buf, pos, eof
+        buf, pos = buf[pos:], 0
+        target = len(buf) + at_least
+        while not eof and len(buf) < target:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                eof = True
+                buf += utf8.decode(b'', final=True)
+            else:
+                buf += utf8.decode(chunk)
+
+    def next_char():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if eof:
+                return ''
+            read_more(1)
+
+    if next_char() != '[':
+        raise ValueError("expected a JSON array")
+    pos += 1
+    if next_char() == ']':
+        return
+    while True:
+        next_char()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                # A scalar cut by the buffer edge decodes short ("-2500." -> -2500, "1e" -> 1):
+                # only accept a value once the character after it can actually follow it
+                if eof or (end < len(buf) and buf[end] in ' \t\r\n,]'):
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            # Grow geometrically so a large element is re-scanned O(log n) times
+            read_more(max(chunk_size, len(buf) - pos))
+        pos = end
+        yield item
+        sep = next_char()
+        if sep == ',':
+            pos += 1
+        elif sep == ']':
+            return
+        else:
+            raise ValueError("malformed JSON array")
+
+# ==========================================
+# 3a. Keep-alive HTTPS Connection Pool
+# ==========================================
+class HTTPConnectionPool:
+    """Bounded pool of persistent http.client connections to the PCE.
+
+    Connections are reused across requests so only the first call pays the
+    TCP + TLS handshake. The SSLContext is built once per (host, ssl_verify)
+    and a request that fails on a reused (stale) socket is retried once on
+    a fresh connection (a POST only if it could not be sent).
+    """
+
+    _STALE_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                     http.client.BadStatusLine, ConnectionResetError, BrokenPipeError)
+    # Safe to resend after the request went out but no response came back
+    _IDEMPOTENT = frozenset(('GET', 'HEAD', 'PUT', 'DELETE'))
+
+    def __init__(self, max_size: int = 4, timeout: int = 30):
+        self.max_size: int = max_size
+        self.timeout: int = timeout
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._target: Optional[Tuple[str, str, bool]] = None
+        self._ssl_ctx: Optional[ssl.SSLContext] = None
+        self.stats: Dict[str, int] = {'created': 0, 'reused': 0, 'reconnects': 0, 'discarded': 0}
+
+    def _retarget(self, scheme, netloc, ssl_verify):
+        """Drop pooled connections and the cached SSLContext when the PCE or SSL setting changes"""
+        target = (scheme, netloc, ssl_verify)
+        if target == self._target:
+            return
+        self.close()
+        self._target = target
+        self._ssl_ctx = None
+        if scheme == 'https':
+            ctx = ssl.create_default_context()
+            if not ssl_verify:
+                ctx.check_hostname = False
+                ctx.verify_mode = ssl.CERT_NONE
+            self._ssl_ctx = ctx
+
+    def _new_connection(self):
+        scheme, netloc, _ = self._target
+        self.stats['created'] += 1
+        if scheme == 'https':
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout, context=self._ssl_ctx)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                self.stats['reused'] += 1
+                return self._idle.pop(), True
+            return self._new_connection(), False
+
+    def _release(self, conn, reusable):
+        with self._lock:
+            if reusable and len(self._idle) < self.max_size:
+                self._idle.append(conn)
+                return
+            self.stats['discarded'] += 1
+        conn.close()
+
+    def _open(self, method, url, body, headers, ssl_verify):
+        """Send the request on a pooled connection and return (conn, response) with the body unread"""
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        with self._lock:
+            self._retarget(parts.scheme, parts.netloc, ssl_verify)
+
+        conn, reused = self._acquire()
+        try:
+            sent = False
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                sent = True
+                return conn, conn.getresponse()
+            except self._STALE_ERRORS:
+                if not reused or (sent and method not in self._IDEMPOTENT):
+                    # A POST may already have been handled (e.g. a provision): never resend it
+                    raise
+                # Server closed the idle keep-alive socket: reconnect once
+                conn.close()
+                with self._lock:
+                    self.stats['reconnects'] += 1
+                    conn = self._new_connection()
+                conn.request(method, path, body=body, headers=headers or {})
+                return conn, conn.getresponse()
+        except Exception:
+            conn.close()
+            raise
+
+    def request(self, method, url, body=None, headers=None, ssl_verify=False):
+        """Send one request and return (status, headers, body bytes)"""
+        conn, resp = self._open(method, url, body, headers, ssl_verify)
+        try:
+            data = resp.read()
+        except Exception:
+            conn.close()
+            raise
+        self._release(conn, not resp.will_close)
+        return resp.status, resp.headers, data
+
+    def stream(self, method, url, body=None, headers=None, ssl_verify=False, on_close=None):
+        """Send one request and return a PooledResponse whose body is read incrementally"""
+        conn, resp = self._open(method, url, body, headers, ssl_verify)
+        return PooledResponse(self, conn, resp, on_close)
+
+    def close(self):
+        """Close every idle connection (caller may or may not hold the lock)"""
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+class PooledResponse:
+    """Streaming response borrowed from HTTPConnectionPool.
+
+    The connection goes back to the pool on close() only if the body was read
+    to the end; a partially read response closes its socket instead.
+    """
+
+    def __init__(self, pool, conn, resp, on_close=None):
+        self._pool = pool
+        self._conn = conn
+        self._resp = resp
+        self._on_close = on_close
+        self.status: int = resp.status
+        self.headers = resp.headers
+
+    def read(self, amt=None):
+        return self._resp.read(amt)
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        self._pool._release(conn, self._resp.isclosed() and not self._resp.will_close)
+        if self._on_close:
+            self._on_close()
+
+# ==========================================
+# 3b. Live State Snapshot (bulk rule_sets index)
+# ==========================================
+class LiveStateSnapshot:
+    """In-memory index of RuleSets and Rules from bulk rule_sets collection fetches.
+
+    Objects are keyed by their draft-form href so that lookups work for both
+    /active/ and /draft/ hrefs; the active copy wins, mirroring get_live_item().
+    """
+
+    def __init__(self, active: Optional[Dict[str, Dict[str, Any]]] = None):
+        # A reused active index (after 304 Not Modified) is shared and never mutated
+        self.active: Dict[str, Dict[str, Any]] = active if active is not None else {}
+        self.draft: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _key(href):
+        return href.replace("/active/", "/draft/")
+
+    def add(self, rule_sets, scope='active'):
+        index = self.active if scope == 'active' else self.draft
+        for rs in rule_sets:
+            index[self._key(rs['href'])] = rs
+            for r in rs.get('rules', []):
+                index[self._key(r['href'])] = r
+
+    def get(self, href):
+        key = self._key(href)
+        return self.active.get(key) or self.draft.get(key)
+
+    def __contains__(self, href):
+        return self.get(href) is not None
+
+# ==========================================
+# 3c. RuleSet Search Index (trigrams)
+# ==========================================
+class RulesetSearchIndex:
+    """Trigram index over RuleSet names, descriptions, rule descriptions and the
+    resolved names of every label / IP list / service a RuleSet references.
+
+    Built once per ruleset snapshot (`source`) and label cache (`labels`), and
+    updated per RuleSet by add()/remove(). search() intersects the posting sets
+    of the query's trigrams, verifies the substring and ranks by field.
+    """
+
+    # Searchable fields in rank order: a name hit outranks a label hit
+    FIELDS = ('name', 'description', 'rules', 'refs')
+
+    def __init__(self, source=None, labels=None):
+        self.source = source
+        self.labels = labels if labels is not None else {}
+        self._docs: Dict[str, Tuple[Dict[str, Any], Dict[str, str]]] = {}
+        self._grams: Dict[str, set] = {}
+
+    @staticmethod
+    def _trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @staticmethod
+    def ref_hrefs(rs):
+        """hrefs of labels, IP lists and services used in the scopes and rules"""
+        for scope in rs.get('scopes') or []:
+            for a in scope:
+                if 'label' in a:
+                    yield a['label']['href']
+        for r in rs.get('rules', []):
+            for a in (r.get('providers') or []) + (r.get('consumers') or []) + (r.get('destinations') or []):
+                for kind in ('label', 'ip_list'):
+                    if kind in a:
+                        yield a[kind]['href']
+            for s in r.get('ingress_services') or []:
+                if 'href' in s:
+                    yield s['href']
+
+    def _fields(self, rs):
+        refs = {self.labels[h] for h in self.ref_hrefs(rs) if h in self.labels}
+        return {
+            'name': (rs.get('name') or '').lower(),
+            'description': (rs.get('description') or '').lower(),
+            'rules': "\n".join(r.get('description') or '' for r in rs.get('rules', [])).lower(),
+            'refs': "\n".join(sorted(refs)).lower(),
+        }
+
+    def add(self, rs):
+        href = rs['href']
+        self.remove(href)
+        fields = self._fields(rs)
+        self._docs[href] = (rs, fields)
+        for gram in self._trigrams("\n".join(fields.values())):
+            self._grams.setdefault(gram, set()).add(href)
+
+    def remove(self, href):
+        doc = self._docs.pop(href, None)
+        if doc is None:
+            return
+        for gram in self._trigrams("\n".join(doc[1].values())):
+            hrefs = self._grams.get(gram)
+            if hrefs is not None:
+                hrefs.discard(href)
+                if not hrefs:
+                    del self._grams[gram]
+
+    def search(self, keyword):
+        """RuleSets containing `keyword` in any field, best-ranked first"""
+        q = keyword.lower().strip()
+        if not q:
+            return [doc[0] for doc in self._docs.values()]
+        if len(q) < 3:
+            candidates = self._docs.keys()
+        else:
+            postings = sorted((self._grams.get(g, set()) for g in self._trigrams(q)), key=len)
+            candidates = set.intersection(*postings) if postings else set()
+
+        ranked = []
+        for href in candidates:
+            rs, fields = self._docs[href]
+            for rank, field in enumerate(self.FIELDS):
+                if q in fields[field]:
+                    if field == 'name' and fields['name'].startswith(q):
+                        rank = -1
+                    ranked.append((rank, fields['name'], rs))
+                    break
+        ranked.sort(key=lambda x: (x[0], x[1]))
+        return [rs for _, _, rs in ranked]
+
+    def __len__(self):
+        return len(self._docs)
+
 # ==========================================
 # 4. PCE API Client (stdlib only)
 # ==========================================
 class PCEClient:
     """Handles all REST API communications with the Illumio Policy Compute Engine (PCE)."""
+
+    # Largest max_results the PCE accepts for a synchronous collection GET
+    SYNC_COLLECTION_CAP = 10000
+    # Events fetched per change-feed poll; a full page means some may have been missed
+    EVENTS_PAGE_SIZE = 500
+    # Seconds an own draft write waits for its matching event before it is forgotten
+    OWN_WRITE_GRACE = 300
+    # Conditionally fetched objects (RuleSets opened by ID) kept with their ETag, LRU
+    ETAG_CACHE_SIZE = 256
     
-    def __init__(self, config_manager: ConfigManager, timeout: int = 30):
+    # Object types a draft dependencies response may list for a change_subset
+    DEPENDENCY_TYPES = ('rule_sets', 'ip_lists', 'services', 'label_groups', 'virtual_services',
+                        'firewall_settings', 'enforcement_boundaries', 'virtual_servers',
+                        'secure_connect_gateways')
+    # Event resource types whose changes can alter any RuleSet's dependency closure
+    DEPENDENCY_EVENT_TYPES = {'label', 'label_group', 'ip_list', 'service', 'virtual_service',
+                              'virtual_server', 'firewall_settings', 'enforcement_boundary',
+                              'secure_connect_gateway'}
+
+    # Name-cache collections (label / IP list / service hrefs -> display names)
+    NAME_COLLECTIONS = {
+        'labels': "/labels",
+        'ip_lists': "/sec_policy/draft/ip_lists",
+        'services': "/sec_policy/draft/services",
+    }
+
+    def __init__(self, config_manager: ConfigManager, timeout: int = 30, cache_path: Optional[str] = None):
         self.cfg: ConfigManager = config_manager
         self.timeout: int = timeout
         self.label_cache: Dict[str, str] = {}
         self.ruleset_cache: List[Dict[str, Any]] = []
+        # Concurrency: worker threads for fan-out, and a per-PCE cap on in-flight requests
+        self.max_concurrency: int = max(1, int(self.cfg.config.get('max_concurrency', 4)))
+        self.max_in_flight: int = max(1, int(self.cfg.config.get('max_in_flight', self.max_concurrency)))
+        self.pool: HTTPConnectionPool = HTTPConnectionPool(
+            max_size=int(self.cfg.config.get('max_connections', self.max_in_flight)), timeout=timeout)
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._worker_state = threading.local()
+        self._provision_lock = threading.Lock()
+        # Conditional GET cache: endpoint -> (ETag, parsed body), least recently used first
+        self._etag_cache: "collections.OrderedDict[str, Tuple[str, Any]]" = collections.OrderedDict()
+        self._etag_lock = threading.Lock()
+        self.cache_stats: Dict[str, int] = {'etag_hits': 0, 'etag_misses': 0,
+                                            'dependency_hits': 0, 'dependency_misses': 0}
+        # Streamed collections keep only the ETag; the consumer keeps what it indexed
+        self._stream_etags: Dict[str, str] = {}
+        self._active_index: Optional[Dict[str, Dict[str, Any]]] = None
+        # Disk-backed name cache with per-collection fetch timestamps
+        self.cache_path: Optional[str] = cache_path
+        self.name_cache_ttl: int = int(self.cfg.config.get('name_cache_ttl', 3600))
+        self._name_sets: Dict[str, Dict[str, str]] = {k: {} for k in self.NAME_COLLECTIONS}
+        self._name_fetched_at: Dict[str, float] = {k: 0.0 for k in self.NAME_COLLECTIONS}
+        self._name_lock = threading.Lock()
+        # Single-flight background refreshes (name cache, ruleset snapshot)
+        self._refresh_threads: Dict[str, threading.Thread] = {}
+        self._refresh_spawn_lock = threading.Lock()
+        # Shared draft ruleset snapshot, served stale-while-revalidate past its TTL
+        self.ruleset_cache_ttl: int = int(self.cfg.config.get('ruleset_cache_ttl', 60))
+        self._ruleset_fetched_at: float = 0.0
+        self._ruleset_lock = threading.Lock()
+        self._search_index: Optional[RulesetSearchIndex] = None
+        self._search_lock = threading.Lock()
+        # Short-lived live-state snapshot for UI status columns (never used by the engine)
+        self.live_state_ttl: int = int(self.cfg.config.get('live_state_ttl', 15))
+        self._live_cache: Optional[Tuple[float, set, LiveStateSnapshot]] = None
+        # Dependency closures keyed by the set of draft RuleSets they were computed for:
+        # frozenset(rs hrefs) -> (computed at, {type: [hrefs]}). Our own enabled/description
+        # PUTs never change them; out-of-band RuleSet edits and label / service / IP list
+        # changes drop them (the generation guards in-flight fills). The TTL only applies
+        # while the events feed is not being read.
+        self.dependency_cache_ttl: int = int(self.cfg.config.get('dependency_cache_ttl', 600))
+        self._dep_cache: Dict[frozenset, Tuple[float, Dict[str, List[str]]]] = {}
+        self._dep_generation = 0
+        self._dep_lock = threading.Lock()
+        self.load_name_cache()
+        # Change feed (events API) position and our own recent draft writes
+        self._events_since: Optional[str] = None
+        self._events_seen: set = set()
+        self._events_read_at: float = 0.0
+        self._own_writes: Dict[str, List[float]] = {}
 
-    def _request(self, method: str, endpoint: str, payload: Optional[Dict[str, Any]] = None) -> Optional[APIResponse]:
-        """Core HTTP method using urllib.request"""
+    def _request(self, method: str, endpoint: str, payload: Optional[Dict[str, Any]] = None,
+                 extra_headers: Optional[Dict[str, str]] = None) -> Optional[APIResponse]:
+        """Core HTTP method over the shared keep-alive connection pool"""
         if not self.cfg.is_ready(): return None
         url = f"{self.cfg.config['pce_url']}/api/v2{endpoint}"
         
@@ -216,65 +1002,351 @@ class PCEClient:
             'Accept': 'application/json',
             'Authorization': self.cfg.get_auth_header()
         }
+        if extra_headers:
+            headers.update(extra_headers)
         
         body = json.dumps(payload).encode('utf-8') if payload else None
-        req = urllib.request.Request(url, data=body, headers=headers, method=method)
         
-        ctx = ssl.create_default_context()
-        if not self.cfg.config.get('ssl_verify', False):
-            ctx.check_hostname = False
-            ctx.verify_mode = ssl.CERT_NONE
-            
         try:
-            resp = urllib.request.urlopen(req, timeout=self.timeout, context=ctx)
-            return APIResponse(resp.status, resp.read())
-        except urllib.error.HTTPError as e:
-            return APIResponse(e.code, e.read() if e.fp else b'')
+            with self._in_flight:
+                status, resp_headers, data = self.pool.request(
+                    method, url, body=body, headers=headers,
+                    ssl_verify=bool(self.cfg.config.get('ssl_verify', False)))
+            return APIResponse(status, data, resp_headers)
         except Exception as e:
             print(f"[API_ERROR] {method} {endpoint}: {e}")
             return None
 
+    # ── Concurrent executor ──
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                    thread_name_prefix="pce-worker",
+                                                    initializer=self._mark_worker)
+            return self._executor
+
+    def _mark_worker(self):
+        self._worker_state.is_worker = True
+
+    def map_concurrent(self, func, items):
+        """Run func(item) for every item on the worker pool; results keep input order.
+
+        Falls back to a plain loop for a single item, when concurrency is 1, or
+        when already running on a worker (avoids pool starvation on nesting).
+        """
+        items = list(items)
+        if len(items) <= 1 or self.max_concurrency <= 1 or getattr(self._worker_state, 'is_worker', False):
+            return [func(i) for i in items]
+        return list(self._get_executor().map(func, items))
+
+    def run_grouped(self, func, items, key):
+        """Like map_concurrent, but items sharing key(item) run serially, in order, on one worker.
+
+        Used for draft PUTs so writes to the same RuleSet are never reordered.
+        """
+        items = list(items)
+        groups: Dict[Any, List[int]] = {}
+        for idx, item in enumerate(items):
+            groups.setdefault(key(item), []).append(idx)
+
+        def run_group(indexes):
+            return [(i, func(items[i])) for i in indexes]
+
+        results: List[Any] = [None] * len(items)
+        for group in self.map_concurrent(run_group, groups.values()):
+            for i, value in group:
+                results[i] = value
+        return results
+
+    def connection_stats(self):
+        """Connection pool counters: created (handshakes), reused, reconnects, discarded"""
+        return dict(self.pool.stats)
+
     def _api_get(self, endpoint):
         return self._request('GET', endpoint)
 
+    def _api_get_cached(self, endpoint):
+        """Conditional GET keyed by endpoint: sends If-None-Match with the last ETag and,
+        on 304 Not Modified, returns the previously parsed object without re-parsing.
+
+        Returns (data, modified); data is None on failure. The cached object is
+        shared between callers and must be treated as read-only.
+        """
+        cached = self._etag_cache.get(endpoint)
+        extra = {'If-None-Match': cached[0]} if cached else None
+        res = self._request('GET', endpoint, extra_headers=extra)
+        if res is None:
+            return None, False
+        if res.status_code == 304 and cached:
+            self.cache_stats['etag_hits'] += 1
+            with self._etag_lock:
+                if endpoint in self._etag_cache:
+                    self._etag_cache.move_to_end(endpoint)
+            return cached[1], False
+        if res.status_code != 200:
+            return None, False
+        self.cache_stats['etag_misses'] += 1
+        data = res.json()
+        etag = res.headers.get('ETag')
+        with self._etag_lock:
+            self._etag_cache.pop(endpoint, None)
+            if etag:
+                self._etag_cache[endpoint] = (etag, data)
+                while len(self._etag_cache) > self.ETAG_CACHE_SIZE:
+                    self._etag_cache.popitem(last=False)
+        return data, True
+
+    def _open_stream(self, endpoint, extra_headers=None):
+        """Open a streaming GET; holds one in-flight slot until the response is closed"""
+        if not self.cfg.is_ready(): return None
+        headers = {
+            'Accept': 'application/json',
+            'Authorization': self.cfg.get_auth_header()
+        }
+        if extra_headers:
+            headers.update(extra_headers)
+        self._in_flight.acquire()
+        try:
+            return self.pool.stream('GET', f"{self.cfg.config['pce_url']}/api/v2{endpoint}", headers=headers,
+                                    ssl_verify=bool(self.cfg.config.get('ssl_verify', False)),
+                                    on_close=self._in_flight.release)
+        except Exception as e:
+            self._in_flight.release()
+            print(f"[API_ERROR] GET {endpoint}: {e}")
+            return None
+
+    def _collection_endpoint(self, path):
+        sep = '&' if '?' in path else '?'
+        return f"{path}{sep}max_results={self.SYNC_COLLECTION_CAP}"
+
+    def stream_collection(self, path, conditional=False):
+        """Stream a collection, yielding one object at a time. Returns (iterator, modified).
+
+        With conditional=True the ETag of the last *fully consumed* stream is sent and a
+        304 yields an empty iterator with modified=False. Above SYNC_COLLECTION_CAP the
+        async export's datafile is streamed instead of the truncated page.
+        On failure returns (None, False).
+        """
+        endpoint = self._collection_endpoint(path)
+        etag = self._stream_etags.get(endpoint) if conditional else None
+        resp = self._open_stream(endpoint, {'If-None-Match': etag} if etag else None)
+        if resp is None:
+            return None, False
+        if resp.status == 304 and etag:
+            resp.read()  # drain the empty body so the connection is reused
+            resp.close()
+            self.cache_stats['etag_hits'] += 1
+            return iter(()), False
+        if resp.status != 200:
+            resp.read()
+            resp.close()
+            return None, False
+        self.cache_stats['etag_misses'] += 1
+
+        total = resp.headers.get('X-Total-Count')
+        if total and str(total).isdigit() and int(total) > self.SYNC_COLLECTION_CAP:
+            # Truncated page: discard it unread and stream the async export instead
+            resp.close()
+            self._stream_etags.pop(endpoint, None)
+            result_href, job_endpoint = self._run_async_export(path)
+            data_resp = self._open_stream(result_href) if result_href else None
+            if data_resp is None or data_resp.status != 200:
+                if data_resp is not None:
+                    data_resp.close()
+                print(f"{Colors.YELLOW}[WARN] {path}: async export failed, using first {self.SYNC_COLLECTION_CAP} of {total} items{Colors.RESET}")
+                return self._iter_stream(self._open_stream(endpoint), None, None), True
+            return self._iter_stream(data_resp, None, None, job_endpoint), True
+
+        return self._iter_stream(resp, endpoint, resp.headers.get('ETag')), True
+
+    def _iter_stream(self, resp, endpoint, etag, job_endpoint=None):
+        if resp is None:
+            return
+        try:
+            for item in iter_json_array(resp):
+                yield item
+            if endpoint and etag:
+                self._stream_etags[endpoint] = etag
+        finally:
+            resp.close()
+            if job_endpoint:
+                # Best-effort cleanup so finished jobs do not pile up on the PCE
+                self._request('DELETE', job_endpoint)
+
+    def _run_async_export(self, path, max_wait=900):
+        """Async collection export: submit with Prefer: respond-async and poll the job with
+        backoff until done/failed. Returns (datafile href or None, job endpoint)."""
+        res = self._request('GET', path, extra_headers={'Prefer': 'respond-async'})
+        if not res or res.status_code != 202 or not res.headers.get('Location'):
+            return None, None
+        job_endpoint = urllib.parse.urlsplit(res.headers.get('Location')).path
+        if job_endpoint.startswith('/api/v2'):
+            job_endpoint = job_endpoint[len('/api/v2'):]
+
+        delay = self._retry_after(res, 1)
+        deadline = time.monotonic() + max_wait
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            job_res = self._api_get(job_endpoint)
+            job = job_res.json() if job_res and job_res.status_code == 200 else {}
+            status = str(job.get('status', '')).lower()
+            if status == 'done':
+                return (job.get('result') or {}).get('href'), job_endpoint
+            if status == 'failed':
+                break
+            delay = min(self._retry_after(job_res, delay * 2), 30)
+        return None, job_endpoint
+
+    @staticmethod
+    def _retry_after(res, default):
+        value = res.headers.get('Retry-After') if res else None
+        return int(value) if value and str(value).isdigit() else default
+
     def _api_put(self, endpoint, payload):
-        return self._request('PUT', endpoint, payload)
+        res = self._request('PUT', endpoint, payload)
+        if res is not None and res.status_code == 204:
+            if self._events_since is not None:
+                # Only poll_changes() consumes (and prunes) these; without a feed they would pile up
+                self._own_writes.setdefault(endpoint, []).append(time.time())
+            self._live_cache = None
+        return res
 
     def _api_post(self, endpoint, payload):
         return self._request('POST', endpoint, payload)
 
-    def update_label_cache(self, silent=False):
-        if not self.cfg.is_ready(): return
+    # ── Name cache (labels / IP lists / services) ──
+    def _name_cache_owner(self):
+        return {'pce_url': self.cfg.config.get('pce_url'), 'org_id': str(self.cfg.config.get('org_id'))}
+
+    def load_name_cache(self):
+        """Load names persisted by a previous run so lookups work before the first refresh"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
         try:
-            r1 = self._api_get(f"/orgs/{self.cfg.config['org_id']}/labels?max_results=10000")
-            if r1 and r1.status_code == 200:
-                for i in r1.json(): 
-                    self.label_cache[i['href']] = f"{i.get('key')}:{i.get('value')}"
-            
-            r2 = self._api_get(f"/orgs/{self.cfg.config['org_id']}/sec_policy/draft/ip_lists?max_results=10000")
-            if r2 and r2.status_code == 200:
-                for i in r2.json():
-                    val = f"[IPList] {i.get('name')}"
-                    self.label_cache[i['href']] = val
-                    self.label_cache[i['href'].replace('/draft/', '/active/')] = val
-                    
-            r3 = self._api_get(f"/orgs/{self.cfg.config['org_id']}/sec_policy/draft/services?max_results=10000")
-            if r3 and r3.status_code == 200:
-                for i in r3.json():
-                    name = i.get('name')
-                    ports = []
-                    for svc in i.get('service_ports', []):
-                        p = svc.get('port')
-                        if p:
-                            proto = "UDP" if svc.get('proto') == 17 else "TCP"
-                            top = f"-{svc['to_port']}" if svc.get('to_port') else ""
-                            ports.append(f"{proto}/{p}{top}")
-                    port_str = f" ({','.join(ports)})" if ports else ""
-                    val = f"{name}{port_str}"
-                    self.label_cache[i['href']] = val
-                    self.label_cache[i['href'].replace('/draft/', '/active/')] = val
-        except Exception as e: 
-            if not silent: print(f"[Cache Error] {e}")
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception:
+            return False
+        if data.get('owner') != self._name_cache_owner():
+            return False
+        for kind, entry in data.get('collections', {}).items():
+            if kind not in self.NAME_COLLECTIONS:
+                continue
+            self._name_sets[kind] = entry.get('names', {})
+            self._name_fetched_at[kind] = float(entry.get('fetched_at', 0))
+            if entry.get('etag') and self._name_sets[kind]:
+                endpoint = self._collection_endpoint(f"/orgs/{self.cfg.config['org_id']}{self.NAME_COLLECTIONS[kind]}")
+                self._stream_etags[endpoint] = entry['etag']
+        self._rebuild_label_cache()
+        return True
+
+    def save_name_cache(self):
+        if not self.cache_path:
+            return
+        org = self.cfg.config['org_id']
+        data = {'owner': self._name_cache_owner(), 'collections': {}}
+        for kind, path in self.NAME_COLLECTIONS.items():
+            data['collections'][kind] = {
+                'fetched_at': self._name_fetched_at[kind],
+                'etag': self._stream_etags.get(self._collection_endpoint(f"/orgs/{org}{path}")),
+                'names': self._name_sets[kind],
+            }
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def _rebuild_label_cache(self):
+        merged: Dict[str, str] = {}
+        for names in self._name_sets.values():
+            merged.update(names)
+        # Swap in one assignment so request threads never see a half-built map
+        self.label_cache = merged
+
+    @staticmethod
+    def _name_entries(kind, i):
+        """Display name(s) for one collection object, keyed by href (draft and active forms)"""
+        if kind == 'labels':
+            return {i['href']: f"{i.get('key')}:{i.get('value')}"}
+        if kind == 'ip_lists':
+            val = f"[IPList] {i.get('name')}"
+        else:
+            name = i.get('name')
+            ports = []
+            for svc in i.get('service_ports', []):
+                p = svc.get('port')
+                if p:
+                    proto = "UDP" if svc.get('proto') == 17 else "TCP"
+                    top = f"-{svc['to_port']}" if svc.get('to_port') else ""
+                    ports.append(f"{proto}/{p}{top}")
+            port_str = f" ({','.join(ports)})" if ports else ""
+            val = f"{name}{port_str}"
+        return {i['href']: val, i['href'].replace('/draft/', '/active/'): val}
+
+    def _refresh_names(self, kind, conditional=True):
+        """Stream one collection; a 304 keeps the names already held. Returns True on success."""
+        path = f"/orgs/{self.cfg.config['org_id']}{self.NAME_COLLECTIONS[kind]}"
+        conditional = conditional and bool(self._name_sets[kind])
+        items, modified = self.stream_collection(path, conditional=conditional)
+        if items is None:
+            return False
+        names: Dict[str, str] = {}
+        for i in items:
+            names.update(self._name_entries(kind, i))
+        if modified:
+            self._name_sets[kind] = names
+            self.invalidate_dependencies()
+        self._name_fetched_at[kind] = time.time()
+        return True
+
+    def stale_name_collections(self):
+        now = time.time()
+        return [k for k, ts in self._name_fetched_at.items() if now - ts > self.name_cache_ttl]
+
+    def update_label_cache(self, silent=False, force=False):
+        """Refresh the collections older than name_cache_ttl (all of them with force=True),
+        fetching them concurrently, then persist the result to disk. A forced refresh is
+        unconditional, since it follows a config change that may point at another PCE."""
+        if not self.cfg.is_ready(): return
+        kinds = list(self.NAME_COLLECTIONS) if force else self.stale_name_collections()
+        if not kinds:
+            return
+
+        def refresh(kind):
+            try:
+                return self._refresh_names(kind, conditional=not force)
+            except Exception as e:
+                if not silent: print(f"[Cache Error] {kind}: {e}")
+                return False
+
+        with self._name_lock:
+            if any(self.map_concurrent(refresh, kinds)):
+                self._rebuild_label_cache()
+                try:
+                    self.save_name_cache()
+                except OSError as e:
+                    if not silent: print(f"[Cache Error] {e}")
+
+    def refresh_label_cache_async(self):
+        """Non-blocking refresh for request handlers: stale collections are refreshed on a
+        background thread while the current names keep being served. Only a cold, empty
+        cache is loaded inline, since there is nothing to show yet."""
+        if not self.label_cache:
+            self.update_label_cache(silent=True)
+            return
+        if self.stale_name_collections():
+            self._refresh_in_background('name-cache', self.update_label_cache, silent=True)
+
+    def _refresh_in_background(self, name, func, **kwargs):
+        """Start func on a daemon thread unless a refresh with the same name is still running"""
+        with self._refresh_spawn_lock:
+            running = self._refresh_threads.get(name)
+            if running and running.is_alive():
+                return
+            thread = threading.Thread(target=func, kwargs=kwargs, name=f"{name}-refresh", daemon=True)
+            self._refresh_threads[name] = thread
+            thread.start()
 
     def resolve_actor_str(self, actors):
         if not actors: return "Any"
@@ -305,94 +1377,363 @@ class PCEClient:
     def get_all_rulesets(self, force_refresh=False):
         if self.ruleset_cache and not force_refresh:
             return self.ruleset_cache
-        res = self._api_get(f"/orgs/{self.cfg.config['org_id']}/sec_policy/draft/rule_sets?max_results=10000")
-        if res and res.status_code == 200: 
-            self.ruleset_cache = res.json()
-            return self.ruleset_cache
-        return []
+        with self._ruleset_lock:
+            items, modified = self.stream_collection(f"/orgs/{self.cfg.config['org_id']}/sec_policy/draft/rule_sets",
+                                                     conditional=bool(self.ruleset_cache))
+            if items is None:
+                return []
+            if modified:
+                try:
+                    self.ruleset_cache = list(items)
+                except Exception as e:
+                    print(f"[API_ERROR] rule_sets stream: {e}")
+                    return []
+            self._ruleset_fetched_at = time.time()
+        return self.ruleset_cache
+
+    def get_rulesets_snapshot(self, force=False):
+        """Draft RuleSets for UI listing. Within ruleset_cache_ttl the in-memory copy is
+        returned as is; past it the stale copy is still returned while a background
+        thread revalidates it. force=True (or an empty cache) reloads inline."""
+        if force or not self.ruleset_cache:
+            return self.get_all_rulesets(force_refresh=True)
+        if time.time() - self._ruleset_fetched_at > self.ruleset_cache_ttl:
+            self._refresh_in_background('rulesets', self.get_all_rulesets, force_refresh=True)
+        return self.ruleset_cache
+
+    def search_index(self):
+        """Search index for the current ruleset snapshot, rebuilt only when the snapshot
+        was reloaded or the label/IP list/service names changed"""
+        rulesets = self.get_rulesets_snapshot()
+        with self._search_lock:
+            index = self._search_index
+            if index is None or index.source is not rulesets or index.labels is not self.label_cache:
+                index = RulesetSearchIndex(source=rulesets, labels=self.label_cache)
+                for rs in rulesets:
+                    index.add(rs)
+                self._search_index = index
+            return index
 
     def search_rulesets(self, keyword):
-        all_rs = self.get_all_rulesets()
-        return [rs for rs in all_rs if keyword.lower() in rs['name'].lower()]
+        """Ranked search over RuleSet names, descriptions, rule descriptions and
+        referenced label / IP list / service names"""
+        index = self.search_index()
+        with self._search_lock:
+            # _refresh_ruleset() updates the index in place from the daemon thread
+            return index.search(keyword)
 
     def get_ruleset_by_id(self, rs_id):
-        res = self._api_get(f"/orgs/{self.cfg.config['org_id']}/sec_policy/draft/rule_sets/{rs_id}")
-        return res.json() if res and res.status_code == 200 else None
+        data, _ = self._api_get_cached(f"/orgs/{self.cfg.config['org_id']}/sec_policy/draft/rule_sets/{rs_id}")
+        return data
 
-    def provision_changes(self, rs_href):
-        """Dependency-aware provisioning: discovers required dependencies first"""
+    def ruleset_version(self, rs):
+        """Version tag of a RuleSet returned by get_ruleset_by_id(): its ETag, else updated_at"""
+        cached = self._etag_cache.get(rs['href'])
+        return cached[0] if cached and cached[1] is rs else rs.get('updated_at')
+
+    # ── Change feed (events API) ──
+    @staticmethod
+    def _event_time(dt):
+        return dt.strftime('%Y-%m-%dT%H:%M:%S.') + f"{dt.microsecond // 1000:03d}Z"
+
+    @staticmethod
+    def _event_hrefs(event):
+        """(resource type, href) of every object touched by an event"""
+        for change in event.get('resource_changes') or []:
+            for rtype, obj in (change.get('resource') or {}).items():
+                if isinstance(obj, dict) and obj.get('href'):
+                    yield rtype, obj['href']
+
+    def _refresh_name(self, kind, href):
+        """Refetch one label / IP list / service into the name cache (drop it if deleted)"""
+        draft_href = href.replace('/active/', '/draft/')
+        res = self._api_get(draft_href)
+        if res is None:
+            return False
+        names = dict(self._name_sets[kind])
+        for h in (draft_href, draft_href.replace('/draft/', '/active/')):
+            names.pop(h, None)
+        if res.status_code == 200:
+            names.update(self._name_entries(kind, res.json()))
+        self._name_sets[kind] = names
+        return True
+
+    def _refresh_ruleset(self, rs_href):
+        """Refetch one draft RuleSet into ruleset_cache (drop it if deleted)"""
+        with self._etag_lock:
+            self._etag_cache.pop(rs_href, None)
+        if not self.ruleset_cache:
+            return
+        res = self._api_get(rs_href)
+        if res is None:
+            return
+        cache = [rs for rs in self.ruleset_cache if rs.get('href') != rs_href]
+        fresh = res.json() if res.status_code == 200 else None
+        if fresh is not None:
+            cache.append(fresh)
+        with self._search_lock:
+            index = self._search_index
+            if index is not None and index.source is self.ruleset_cache:
+                # Carry the index over to the new list, touching only this RuleSet
+                if fresh is not None:
+                    index.add(fresh)
+                else:
+                    index.remove(rs_href)
+                index.source = cache
+            self.ruleset_cache = cache
+
+    def poll_changes(self):
+        """Read the PCE events feed since the previous poll and refresh only the cached
+        objects that changed. The first call just records the starting point.
+
+        Returns the draft hrefs of rules / RuleSets changed outside this scheduler,
+        or None if the feed could not be read completely (callers should then
+        treat everything as changed).
+        """
+        if not self.cfg.is_ready(): return set()
         org = self.cfg.config['org_id']
-        
-        # Step 1: Check what dependencies this ruleset needs
-        dep_payload = {"change_subset": {"rule_sets": [{"href": rs_href}]}}
-        dep_res = self._api_post(f"/orgs/{org}/sec_policy/draft/dependencies", dep_payload)
-        
-        # Step 2: Build complete change_subset including all dependencies
-        final_subset = {"rule_sets": [{"href": rs_href}]}
-        
-        if dep_res and dep_res.status_code == 200:
-            deps = dep_res.json()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if self._events_since is None:
+            self._events_since = self._event_time(now)
+            self._events_read_at = time.time()
+            return set()
+
+        query = urllib.parse.urlencode({'timestamp[gte]': self._events_since, 'max_results': self.EVENTS_PAGE_SIZE})
+        res = self._api_get(f"/orgs/{org}/events?{query}")
+        if res is None or res.status_code != 200:
+            return None
+        events = sorted(res.json(), key=lambda e: e.get('timestamp', ''))
+        self._events_read_at = time.time()
+        if len(events) >= self.EVENTS_PAGE_SIZE:
+            # Too many changes to follow one by one: fall back to full revalidation
+            for kind in self._name_fetched_at:
+                self._name_fetched_at[kind] = 0.0
+            with self._etag_lock:
+                self._etag_cache.clear()
+            self.invalidate_dependencies()
+            self._events_since, self._events_seen = self._event_time(now), set()
+            return None
+
+        name_kinds = {'label': 'labels', 'ip_list': 'ip_lists', 'service': 'services'}
+        names_changed = set()
+        rulesets_changed = set()
+        out_of_band = set()
+        cutoff = time.time() - self.OWN_WRITE_GRACE
+        deps_changed = False
+        for ev in events:
+            if ev.get('href') in self._events_seen or ev.get('status', 'success') != 'success':
+                continue
+            for rtype, href in self._event_hrefs(ev):
+                deps_changed = deps_changed or rtype in self.DEPENDENCY_EVENT_TYPES
+                if rtype in name_kinds:
+                    names_changed.add((name_kinds[rtype], href))
+                elif rtype in ('rule_set', 'sec_rule'):
+                    draft_href = href.replace('/active/', '/draft/')
+                    rulesets_changed.add(self.parent_ruleset_href(draft_href))
+                    # Each of our own PUTs accounts for exactly one event on that object
+                    own = [t for t in self._own_writes.get(draft_href, ()) if t >= cutoff]
+                    if own:
+                        self._own_writes[draft_href] = own[1:]
+                    else:
+                        out_of_band.add(draft_href)
+
+        if events:
+            last = events[-1].get('timestamp')
+            if last and last != self._events_since:
+                self._events_since, self._events_seen = last, set()
+            # Events at the boundary timestamp come back on the next gte query
+            self._events_seen.update(e.get('href') for e in events if e.get('timestamp') == self._events_since)
+        self._own_writes = {h: [t for t in ts if t >= cutoff] for h, ts in self._own_writes.items()
+                            if any(t >= cutoff for t in ts)}
+
+        if names_changed:
+            with self._name_lock:
+                if any([self._refresh_name(kind, href) for kind, href in names_changed]):
+                    self._rebuild_label_cache()
+                    try:
+                        self.save_name_cache()
+                    except OSError:
+                        pass
+        for rs_href in rulesets_changed:
+            self._refresh_ruleset(rs_href)
+        if rulesets_changed:
+            self._live_cache = None
+        if deps_changed:
+            self.invalidate_dependencies()
+        elif out_of_band:
+            self.invalidate_dependencies({self.parent_ruleset_href(h) for h in out_of_band})
+        return out_of_band
+
+    @staticmethod
+    def parent_ruleset_href(href):
+        """Return the draft RuleSet href that owns a rule (or the RuleSet itself)"""
+        return "/".join(href.replace("/active/", "/draft/").split("/")[:7])
+
+    def invalidate_dependencies(self, rs_hrefs=None):
+        """Forget the cached dependency closures involving rs_hrefs (all of them if None)"""
+        with self._dep_lock:
+            self._dep_generation += 1
+            if rs_hrefs is None:
+                self._dep_cache.clear()
+            else:
+                dropped = set(rs_hrefs)
+                for key in [k for k in self._dep_cache if k & dropped]:
+                    del self._dep_cache[key]
+
+    def _cached_dependencies(self, rs_hrefs):
+        """Cached closures covering part of rs_hrefs: ([closure, ...], uncovered hrefs)"""
+        now = time.time()
+        feed_live = now - self._events_read_at < self.dependency_cache_ttl
+        remaining = set(rs_hrefs)
+        closures = []
+        for key, (computed_at, closure) in list(self._dep_cache.items()):
+            if key <= remaining and (feed_live or now - computed_at < self.dependency_cache_ttl):
+                closures.append(closure)
+                remaining -= key
+        return closures, remaining
+
+    def _dependencies(self, rs_hrefs):
+        """Dependency closures for a set of draft RuleSets, as a list of {type: [hrefs]}.
+
+        Cached closures are reused; the RuleSets not covered by them are looked up
+        with one merged /sec_policy/draft/dependencies POST, whose result is cached
+        for exactly that set. A failed lookup is not cached.
+        """
+        closures, missing = self._cached_dependencies(rs_hrefs)
+        self.cache_stats['dependency_hits'] += len(set(rs_hrefs)) - len(missing)
+        if not missing:
+            return closures
+        self.cache_stats['dependency_misses'] += len(missing)
+        generation = self._dep_generation
+        missing = [h for h in rs_hrefs if h in missing]
+        dep_payload = {"change_subset": {"rule_sets": [{"href": h} for h in missing]}}
+        dep_res = self._api_post(f"/orgs/{self.cfg.config['org_id']}/sec_policy/draft/dependencies", dep_payload)
+        if not dep_res or dep_res.status_code != 200:
+            return closures
+        deps = dep_res.json() or {}
+        closure = {t: [i['href'] for i in deps.get(t) or [] if i.get('href')] for t in self.DEPENDENCY_TYPES}
+        with self._dep_lock:
+            if generation == self._dep_generation:
+                self._dep_cache[frozenset(missing)] = (time.time(), closure)
+        return closures + [closure]
+
+    def _build_change_subset(self, rs_hrefs):
+        """Merge the dependency closure of all given RuleSets into one change_subset.
+
+        At most one dependencies POST is made (for the RuleSets not cached), so
+        RuleSets provisioned again with unchanged dependencies cost no extra round trip.
+        """
+        rs_refs = [{"href": h} for h in rs_hrefs]
+        final_subset = {"rule_sets": list(rs_refs)}
+        for closure in self._dependencies(rs_hrefs):
             # Merge any dependent objects into the change_subset
-            for obj_type in ['rule_sets', 'ip_lists', 'services', 'label_groups', 
-                             'virtual_services', 'firewall_settings', 'enforcement_boundaries',
-                             'virtual_servers', 'secure_connect_gateways']:
-                dep_items = deps.get(obj_type, [])
-                if dep_items:
+            for obj_type, dep_hrefs in closure.items():
+                if dep_hrefs:
                     existing = final_subset.get(obj_type, [])
                     existing_hrefs = {item['href'] for item in existing}
-                    for item in dep_items:
-                        if item.get('href') and item['href'] not in existing_hrefs:
-                            existing.append({"href": item['href']})
+                    for href in dep_hrefs:
+                        if href not in existing_hrefs:
+                            existing.append({"href": href})
+                            existing_hrefs.add(href)
                     final_subset[obj_type] = existing
-        
-        # Step 3: Provision with full dependency set
+        return final_subset
+
+    def _provision_subset(self, change_subset):
+        """POST a policy version. Callers hold _provision_lock so provisioning stays serialized."""
+        org = self.cfg.config['org_id']
         payload = {
             "update_description": "Auto-Scheduler: Status/Note Update", 
-            "change_subset": final_subset
+            "change_subset": change_subset
         }
         res = self._api_post(f"/orgs/{org}/sec_policy", payload)
+        self._live_cache = None
+        return res
+
+    def provision_changes(self, rs_href):
+        """Dependency-aware provisioning: discovers required dependencies first"""
+        with self._provision_lock:
+            cached = not self._cached_dependencies([rs_href])[1]
+            res = self._provision_subset(self._build_change_subset([rs_href]))
+            if cached and res is not None and res.status_code != 201:
+                # The cached closure may be out of date: recompute it and retry once
+                self.invalidate_dependencies([rs_href])
+                res = self._provision_subset(self._build_change_subset([rs_href]))
         if res and res.status_code == 201:
             return True
         err = res.text if res else "Connection Error"
         print(f"{Colors.RED}[PROVISION FAILED] RuleSet {extract_id(rs_href)}: {err}{Colors.RESET}")
         return False
 
-    def update_rule_note(self, href, schedule_info, remove=False):
-        draft_href = href.replace("/active/", "/draft/")
-        res = self._api_get(draft_href)
-        if not res or res.status_code != 200: 
-            return False
-            
-        data = res.json()
-        current_desc = data.get('description', '') or ''
-        
+    def provision_batch(self, rs_hrefs):
+        """Provision several RuleSets as one policy version.
+
+        A merged change_subset built from cached closures is recomputed and retried
+        once, like provision_changes(); only if it is still rejected does this fall
+        back to one provision per RuleSet. Returns {rs_href: success}.
+        """
+        rs_hrefs = list(dict.fromkeys(rs_hrefs))
+        if not rs_hrefs:
+            return {}
+        if len(rs_hrefs) == 1:
+            return {rs_hrefs[0]: self.provision_changes(rs_hrefs[0])}
+
+        with self._provision_lock:
+            cached = bool(self._cached_dependencies(rs_hrefs)[0])
+            res = self._provision_subset(self._build_change_subset(rs_hrefs))
+            if cached and res is not None and res.status_code != 201:
+                # A cached closure may be out of date: recompute all of them and retry once
+                self.invalidate_dependencies(rs_hrefs)
+                res = self._provision_subset(self._build_change_subset(rs_hrefs))
+        if res and res.status_code == 201:
+            return {h: True for h in rs_hrefs}
+        err = res.text if res else "Connection Error"
+        print(f"{Colors.YELLOW}[PROVISION] Merged provision of {len(rs_hrefs)} RuleSets rejected, retrying individually: {err}{Colors.RESET}")
+        self.invalidate_dependencies(rs_hrefs)
+        return {h: self.provision_changes(h) for h in rs_hrefs}
+
+    def mutations(self) -> 'DraftMutationBatch':
+        """Start a batch of draft field changes (see DraftMutationBatch)"""
+        return DraftMutationBatch(self)
+
+    def update_rule_note(self, href, schedule_info, remove=False, provision=True):
+        """Rewrite the schedule tag in the draft description.
+
+        With provision=False only the draft PUT is made; the caller is responsible
+        for provisioning the parent RuleSet (see provision_batch).
+        """
+        batch = self.mutations()
+        batch.set_note(href, schedule_info, remove)
+        if provision:
+            outcomes, provisioned = batch.commit()
+            return all(provisioned.values()) and outcomes[batch.key(href)] is not None
+        return batch.flush()[batch.key(href)] is not None
+
+    def update_rule_notes(self, notes, remove=False):
+        """update_rule_note() for many hrefs ({href: schedule_info}) with one provision.
+
+        Draft PUTs run in parallel (serially per RuleSet), then every RuleSet that
+        actually changed is provisioned in a single policy version.
+        Returns {href: success}.
+        """
+        batch = self.mutations()
+        for href, info in notes.items():
+            batch.set_note(href, info, remove)
+        outcomes, provisioned = batch.commit()
+        result = {}
+        for href in notes:
+            outcome = outcomes[batch.key(href)]
+            result[href] = outcome == 'unchanged' or (outcome == 'written' and provisioned[self.parent_ruleset_href(href)])
+        return result
+
+    @staticmethod
+    def note_description(current_desc, schedule_info, remove=False):
+        """The description with its schedule tag replaced by schedule_info (or stripped)"""
         clean_desc = re.sub(r'\s*\[📅[^\]]*\]', '', current_desc)
         clean_desc = re.sub(r'\s*\[⏳[^\]]*\]', '', clean_desc)
         clean_desc = clean_desc.strip()
-        
-        new_desc = clean_desc
-        if not remove:
-            new_desc = f"{clean_desc}\n{schedule_info}".strip() if clean_desc else schedule_info
-        
-        if new_desc == current_desc: 
-            return True
-
-        put_res = self._api_put(draft_href, {"description": new_desc})
-        if put_res and put_res.status_code == 204:
-            rs_href = "/".join(draft_href.split("/")[:7])
-            return self.provision_changes(rs_href)
-        return False
-
-    def toggle_and_provision(self, href, target_enabled, is_ruleset=False):
-        draft_href = href.replace("/active/", "/draft/")
-        
-        put_res = self._api_put(draft_href, {"enabled": target_enabled})
-        if not put_res or put_res.status_code != 204:
-            print(f"{Colors.RED}[UPDATE FAILED] Target: {extract_id(href)}{Colors.RESET}")
-            return False
-            
-        rs_href = draft_href if is_ruleset else "/".join(draft_href.split("/")[:7])
-        return self.provision_changes(rs_href)
+        if remove:
+            return clean_desc
+        return f"{clean_desc}\n{schedule_info}".strip() if clean_desc else schedule_info
 
     def get_live_item(self, href):
         """Try both active and draft paths to find the item"""
@@ -409,6 +1750,61 @@ class PCEClient:
                 return res
         return res  # return last response for error handling
 
+    def get_live_snapshot_cached(self, hrefs=()):
+        """get_live_snapshot() for UI status columns: reused for live_state_ttl seconds
+        as long as it was built for (at least) the same hrefs. Our own PUTs and
+        provisions, and RuleSet changes seen on the events feed, drop it."""
+        hrefs = set(hrefs)
+        cached = self._live_cache
+        if cached and time.time() - cached[0] < self.live_state_ttl and hrefs <= cached[1]:
+            return cached[2]
+        snapshot = self.get_live_snapshot(hrefs)
+        if snapshot is not None:
+            self._live_cache = (time.time(), hrefs, snapshot)
+        return snapshot
+
+    def get_live_snapshot(self, hrefs=()):
+        """Bulk-fetch live state for many hrefs: one active rule_sets GET, plus one draft GET
+        only if some of `hrefs` are not provisioned. Returns None if the fetch failed."""
+        if not self.cfg.is_ready(): return None
+        org = self.cfg.config['org_id']
+        items, modified = self.stream_collection(f"/orgs/{org}/sec_policy/active/rule_sets",
+                                                 conditional=self._active_index is not None)
+        if items is None:
+            return None
+        if modified:
+            # Index rule sets as they arrive; the raw collection is never held in memory
+            snapshot = LiveStateSnapshot()
+            try:
+                snapshot.add(items, 'active')
+            except Exception as e:
+                print(f"[API_ERROR] active rule_sets stream: {e}")
+                return None
+            self._active_index = snapshot.active
+        else:
+            snapshot = LiveStateSnapshot(active=self._active_index)
+        if any(h not in snapshot for h in hrefs):
+            snapshot.add(self.get_all_rulesets(force_refresh=True), 'draft')
+        return snapshot
+
+    def lookup_live(self, href, snapshot=None):
+        """Return (live object or None, reachable). Uses the snapshot when given,
+        otherwise falls back to a per-item get_live_item() call."""
+        if snapshot is not None:
+            return snapshot.get(href), True
+        res = self.get_live_item(href)
+        if res is None:
+            return None, False
+        return (res.json() if res.status_code == 200 else None), True
+
+    def lookup_live_many(self, hrefs, snapshot=None):
+        """lookup_live() for many hrefs: {href: (obj, reachable)}. Without a snapshot the
+        per-item fallback GETs are fanned out over the worker pool."""
+        hrefs = list(hrefs)
+        if snapshot is not None:
+            return {h: (snapshot.get(h), True) for h in hrefs}
+        return dict(zip(hrefs, self.map_concurrent(self.lookup_live, hrefs)))
+
     def get_provision_state(self, href):
         """Check provision state: 'active' if provisioned, 'draft' if draft-only, 'unknown' on error"""
         active_href = href.replace("/draft/", "/active/")
@@ -422,9 +1818,153 @@ class PCEClient:
     def is_provisioned(self, href):
         return self.get_provision_state(href) == 'active'
 
+# ==========================================
+# 4a. Activity Bus (live engine activity for the Web GUI)
+# ==========================================
+class ActivityBus:
+    """Bounded in-process ring buffer of engine activity: log lines, state
+    changes, provisioning results and schedule edits.
+
+    Every event gets an increasing id; a subscriber remembers the last id it
+    saw (the SSE Last-Event-ID) and blocks in wait() until newer ones exist.
+    Events older than `capacity` are dropped.
+    """
+
+    def __init__(self, capacity: int = 500):
+        self._events: collections.deque = collections.deque(maxlen=capacity)
+        self._next_id: int = 1
+        self._cond = threading.Condition()
+
+    def publish(self, kind, **data):
+        with self._cond:
+            event = {'id': self._next_id, 'type': kind,
+                     'ts': datetime.datetime.now().isoformat(timespec='seconds')}
+            event.update(data)
+            self._next_id += 1
+            self._events.append(event)
+            self._cond.notify_all()
+        return event
+
+    @property
+    def last_id(self):
+        return self._next_id - 1
+
+    def wait(self, last_id, timeout=None):
+        """Events newer than last_id, waiting up to `timeout` seconds for the first one"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._next_id - 1 > last_id, timeout)
+            return [e for e in self._events if e['id'] > last_id]
+
+# ==========================================
+# 4b. Draft Mutation Batch (one PUT per object, one provision per pass)
+# ==========================================
+class DraftMutationBatch:
+    """Field changes to draft Rules / RuleSets, collected before anything is written.
+
+    set_enabled() and set_note() only stage a change. flush() merges everything
+    staged for an object into a single PUT (objects of different RuleSets in
+    parallel, objects of one RuleSet in order); commit() then provisions every
+    RuleSet that changed as one policy version.
+    """
+
+    def __init__(self, pce: 'PCEClient'):
+        self.pce = pce
+        self._fields: Dict[str, Dict[str, Any]] = {}
+        self._notes: Dict[str, Tuple[str, bool]] = {}
+
+    @staticmethod
+    def key(href):
+        return href.replace("/active/", "/draft/")
+
+    def set_enabled(self, href, enabled):
+        self._fields.setdefault(self.key(href), {})['enabled'] = enabled
+
+    def set_note(self, href, schedule_info, remove=False):
+        """Stage a rewrite of the schedule tag; the description is read at flush time"""
+        self._notes[self.key(href)] = (schedule_info, remove)
+        self._fields.setdefault(self.key(href), {})
+
+    def __len__(self):
+        return len(self._fields)
+
+    def _write(self, href):
+        """One PUT for everything staged on href: 'written', 'unchanged', or None on failure.
+
+        A note whose draft cannot be read is dropped; the other fields are still written.
+        """
+        payload = dict(self._fields[href])
+        note_failed = False
+        if href in self._notes:
+            res = self.pce._api_get(href)
+            if res and res.status_code == 200:
+                current = res.json().get('description', '') or ''
+                new_desc = self.pce.note_description(current, *self._notes[href])
+                if new_desc != current:
+                    payload['description'] = new_desc
+            else:
+                note_failed = True
+        if not payload:
+            return None if note_failed else 'unchanged'
+        put_res = self.pce._api_put(href, payload)
+        if put_res and put_res.status_code == 204:
+            return 'written'
+        print(f"{Colors.RED}[UPDATE FAILED] Target: {extract_id(href)}{Colors.RESET}")
+        return None
+
+    def flush(self, on_result=None) -> Dict[str, Optional[str]]:
+        """Write all staged changes. Returns {draft href: 'written' | 'unchanged' | None};
+        on_result(href, outcome) is called as each object completes."""
+        def write(href):
+            try:
+                outcome = self._write(href)
+            except Exception as e:
+                print(f"[API_ERROR] draft update {extract_id(href)}: {e}")
+                outcome = None
+            if on_result:
+                on_result(href, outcome)
+            return outcome
+
+        hrefs = list(self._fields)
+        outcomes = self.pce.run_grouped(write, hrefs, key=self.pce.parent_ruleset_href)
+        self._fields, self._notes = {}, {}
+        return dict(zip(hrefs, outcomes))
+
+    def commit(self, on_result=None):
+        """flush(), then provision the RuleSets of all written objects at once.
+        Returns (outcomes, {rs_href: provisioned})."""
+        outcomes = self.flush(on_result)
+        rs_hrefs = [self.pce.parent_ruleset_href(h) for h, o in outcomes.items() if o == 'written']
+        return outcomes, self.pce.provision_batch(rs_hrefs)
+
 # ==========================================
 # 5. Schedule Engine (Core Logic)
 # ==========================================
+class CheckJob:
+    """One ScheduleEngine.check() run on a background thread, with live progress counters."""
+
+    def __init__(self, key):
+        self.id: str = uuid.uuid4().hex[:12]
+        self.key = key
+        self.status: str = 'running'  # running | done | failed
+        self.progress: Dict[str, int] = {'total': 0, 'evaluated': 0, 'toggled': 0, 'provisioned': 0, 'failed': 0}
+        self.logs: List[str] = []
+        self.error: Optional[str] = None
+        self.started_at: datetime.datetime = datetime.datetime.now()
+        self.finished_at: Optional[datetime.datetime] = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def to_dict(self, with_logs=False):
+        d = {'id': self.id, 'status': self.status, 'progress': dict(self.progress), 'error': self.error,
+             'started_at': self.started_at.isoformat(timespec='seconds'),
+             'finished_at': self.finished_at.isoformat(timespec='seconds') if self.finished_at else None}
+        if with_logs:
+            d['logs'] = [strip_ansi(l) for l in self.logs]
+        return d
+
+
 class ScheduleEngine:
     """Analyzes schedule timings and executes API enforcement actions upon matching."""
     
@@ -433,20 +1973,68 @@ class ScheduleEngine:
         "thu": "thursday", "fri": "friday", "sat": "saturday", "sun": "sunday"
     }
 
-    def __init__(self, db: ScheduleDB, pce_client: PCEClient):
+    # One running check job per PCE (pce_url, org_id), shared by every engine in the process
+    _running_jobs: Dict[Tuple[Any, Any], CheckJob] = {}
+    _jobs_lock = threading.Lock()
+    # Finished jobs kept for the result endpoint
+    JOB_HISTORY = 20
+
+    def __init__(self, db: ScheduleDB, pce_client: PCEClient, activity: Optional[ActivityBus] = None):
         self.db: ScheduleDB = db
         self.pce: PCEClient = pce_client
+        self.activity: ActivityBus = activity or ActivityBus()
+        self.jobs: "collections.OrderedDict[str, CheckJob]" = collections.OrderedDict()
 
     @staticmethod
     def normalize_day(day_str: str) -> str:
         d = day_str.lower().strip()
         return ScheduleEngine.DAY_MAP.get(d[:3], d)
 
-    def check(self, silent: bool = False) -> List[str]:
+    def submit_check(self) -> CheckJob:
+        """Run check() on a background thread. While a check for the same PCE is
+        running, the running job is returned instead of starting another one."""
+        key = (self.pce.cfg.config.get('pce_url'), str(self.pce.cfg.config.get('org_id')))
+        with ScheduleEngine._jobs_lock:
+            job = ScheduleEngine._running_jobs.get(key)
+            if job is not None:
+                return job
+            job = CheckJob(key)
+            ScheduleEngine._running_jobs[key] = job
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.JOB_HISTORY:
+                self.jobs.popitem(last=False)
+        threading.Thread(target=self._run_job, args=(job,), name=f"check-{job.id}", daemon=True).start()
+        return job
+
+    def _run_job(self, job):
+        try:
+            job.logs = self.check(silent=True, progress=job.progress)
+            job.status = 'done'
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            job.status, job.error = 'failed', str(e)
+        finally:
+            job.finished_at = datetime.datetime.now()
+            with ScheduleEngine._jobs_lock:
+                if ScheduleEngine._running_jobs.get(job.key) is job:
+                    del ScheduleEngine._running_jobs[job.key]
+            job._done.set()
+
+    def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    def check(self, silent: bool = False, progress: Optional[Dict[str, int]] = None) -> List[str]:
+        """One enforcement pass. `progress` (if given) is updated in place with the
+        counts of items evaluated, toggled, provisioned and failed."""
         if not self.pce.cfg.is_ready(): 
             return []
+        if progress is None:
+            progress = {}
             
-        db_data = self.db.get_all()
+        # One consistent copy for the whole pass: GUI request threads may put()/delete() meanwhile
+        db_data = dict(self.db.get_all())
+        progress['total'] = len(db_data)
         now = datetime.datetime.now()
         curr_t = now.strftime("%H:%M")
         curr_d = now.strftime("%A").lower()
@@ -455,13 +2043,24 @@ class ScheduleEngine:
         logs = []
         def log(msg):
             logs.append(msg)
+            self.activity.publish('log', msg=strip_ansi(msg))
             if not silent: print(msg, flush=True)
 
+        self.activity.publish('check', phase='start')
         log(f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] 檢查排程...")
         
+        # One bulk fetch answers every enabled-state lookup of this pass
+        snapshot = self.pce.get_live_snapshot(list(db_data.keys())) if db_data else None
+        live_state = self.pce.lookup_live_many(db_data.keys(), snapshot)
+
         expired_hrefs = []
+        # Changes are decided first and staged per object: an expiring rule's
+        # enabled flag and note removal become one PUT, and every RuleSet is
+        # provisioned at most once per pass
+        ops = []  # (href, conf, target_enabled, expired)
 
         for href, c in list(db_data.items()):
+            progress['evaluated'] = progress.get('evaluated', 0) + 1
             is_allow = (c.get('action', 'allow') == 'allow')
             in_window = False
             target = False
@@ -481,29 +2080,292 @@ class ScheduleEngine:
                 target = in_window if is_allow else (not in_window)
 
             elif c['type'] == 'one_time':
-                expire_dt = datetime.datetime.fromisoformat(c['expire_at'])
+                expire_dt = datetime.datetime.fromisoformat(c['expire_at'].rstrip('Z'))
                 if now > expire_dt:
                     log(f"{Colors.RED}[EXPIRED] {c['name']} (ID:{extract_id(href)}) 已過期。{Colors.RESET}")
-                    self.pce.toggle_and_provision(href, False, c.get('is_ruleset'))
-                    self.pce.update_rule_note(href, "", remove=True)
+                    ops.append((href, c, False, True))
                     expired_hrefs.append(href)
                     continue
                 else:
                     target = True
 
-            res = self.pce.get_live_item(href)
-            if res and res.status_code == 200:
-                curr_status = res.json().get('enabled')
+            live, _ = live_state[href]
+            if live is not None:
+                curr_status = live.get('enabled')
                 if curr_status != target:
                     r_name = c.get('detail_name', c['name'])
                     status_str = f"{Colors.GREEN}Enabled{Colors.RESET}" if target else f"{Colors.RED}Disabled{Colors.RESET}"
                     log(f"[ACTION] 切換狀態 -> {status_str} (ID: {Colors.CYAN}{extract_id(href)}{Colors.RESET}) - {r_name}")
-                    if self.pce.toggle_and_provision(href, target, c.get('is_ruleset')):
-                        log(f"{Colors.GREEN}[SUCCESS] 已提交發布{Colors.RESET}")
+                    ops.append((href, c, target, False))
+
+        batch = self.pce.mutations()
+        staged = {}
+        for op in ops:
+            href, c, target, expired = op
+            batch.set_enabled(href, target)
+            if expired:
+                batch.set_note(href, "", remove=True)
+            staged[batch.key(href)] = op
+
+        progress_lock = threading.Lock()
 
-        for h in expired_hrefs: 
-            self.db.delete(h)
+        def applied(key, outcome):
+            # Runs on the pce-worker threads
+            href, c, target, expired = staged[key]
+            ok = outcome is not None
+            counter = 'toggled' if ok else 'failed'
+            with progress_lock:
+                progress[counter] = progress.get(counter, 0) + 1
+            self.activity.publish('state', href=href, name=c.get('detail_name', c['name']),
+                                  enabled=target, expired=expired, ok=ok)
+
+        pending = {}  # rs_href -> [(href, display name), ...]
+        outcomes, results = batch.commit(on_result=applied) if ops else ({}, {})
+        for key, outcome in outcomes.items():
+            href, c, _, _ = staged[key]
+            if outcome == 'written':
+                pending.setdefault(self.pce.parent_ruleset_href(href), []).append((href, c.get('detail_name', c['name'])))
+
+        if pending:
+            for rs_href, ok in results.items():
+                key = 'provisioned' if ok else 'failed'
+                progress[key] = progress.get(key, 0) + len(pending[rs_href])
+                self.activity.publish('provision', rs_href=rs_href, ok=ok, hrefs=[h for h, _ in pending[rs_href]])
+            ok_count = sum(len(pending[h]) for h, ok in results.items() if ok)
+            if ok_count:
+                log(f"{Colors.GREEN}[SUCCESS] 已提交發布 ({ok_count} 項, {sum(1 for ok in results.values() if ok)} 個規則集){Colors.RESET}")
+            for rs_href, ok in results.items():
+                if not ok:
+                    for h, name in pending[rs_href]:
+                        log(f"{Colors.RED}[FAILED] 發布失敗 (ID: {extract_id(h)}) - {name}{Colors.RESET}")
+
+        with self.db.acting_as('engine'), self.db.batch():
+            for h in expired_hrefs: 
+                self.db.delete(h)
         if expired_hrefs:
             log(f"{Colors.YELLOW}[CLEANUP] 已移除 {len(expired_hrefs)} 筆過期排程。{Colors.RESET}")
-            
+            self.activity.publish('schedule', action='expired', hrefs=expired_hrefs)
+
+        self.activity.publish('check', phase='done', changes=len(ops))
         return logs
+
+
+# ==========================================
+# 6. Transition Timeline (Event-driven Daemon)
+# ==========================================
+class ScheduleTimeline:
+    """Priority queue of the next start/end/expire instant of every schedule.
+
+    Entries are keyed by href and fingerprinted, so sync() only recomputes the
+    schedules that were added, edited or removed since the previous call.
+    Stale heap nodes are discarded lazily when they reach the top.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime.datetime, str]] = []
+        self._entries: Dict[str, Tuple[str, Optional[datetime.datetime]]] = {}
+
+    @staticmethod
+    def _fingerprint(conf):
+        return json.dumps(conf, sort_keys=True, ensure_ascii=False)
+
+    @staticmethod
+    def next_transition(conf, now):
+        """Next instant after `now` at which the desired state of `conf` can change"""
+        if conf.get('type') == 'one_time':
+            try:
+                expire_dt = datetime.datetime.fromisoformat(conf['expire_at'].rstrip('Z'))
+            except (KeyError, TypeError, ValueError):
+                return None
+            # check() expires strictly after expire_at; wake one second later.
+            # Already-expired entries are picked up by the check that sync() triggers.
+            instant = expire_dt.replace(tzinfo=None) + datetime.timedelta(seconds=1)
+            return instant if instant > now else None
+
+        if conf.get('type') != 'recurring':
+            return None
+        try:
+            days = {ScheduleEngine.normalize_day(d) for d in conf.get('days', [])}
+            start_h, start_m = (int(x) for x in conf['start'].split(':'))
+            end_h, end_m = (int(x) for x in conf['end'].split(':'))
+        except (KeyError, ValueError, AttributeError):
+            return None
+        overnight = conf['start'] > conf['end']
+
+        best = None
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        for offset in range(-1, 8):
+            day = today + datetime.timedelta(days=offset)
+            if day.strftime("%A").lower() not in days:
+                continue
+            start = day.replace(hour=start_h, minute=start_m)
+            end = day.replace(hour=end_h, minute=end_m)
+            if overnight:
+                end += datetime.timedelta(days=1)
+            for instant in (start, end):
+                if instant > now and (best is None or instant < best):
+                    best = instant
+        return best
+
+    def _push(self, href, conf, now):
+        when = self.next_transition(conf, now)
+        self._entries[href] = (self._fingerprint(conf), when)
+        if when is not None:
+            heapq.heappush(self._heap, (when, href))
+
+    def sync(self, db_data, now):
+        """Incrementally bring the queue in line with the current DB contents. Returns changed hrefs."""
+        changed = []
+        for href in list(self._entries):
+            if href not in db_data:
+                del self._entries[href]
+                changed.append(href)
+        for href, conf in db_data.items():
+            known = self._entries.get(href)
+            if known is None or known[0] != self._fingerprint(conf):
+                self._push(href, conf, now)
+                changed.append(href)
+        return changed
+
+    def _drop_stale(self):
+        while self._heap:
+            when, href = self._heap[0]
+            known = self._entries.get(href)
+            if known is not None and known[1] == when:
+                return
+            heapq.heappop(self._heap)
+
+    def peek(self):
+        """Earliest pending transition instant, or None if nothing is scheduled"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, db_data, now):
+        """Remove and reschedule every transition at or before `now`. Returns their hrefs."""
+        due = []
+        while self.peek() is not None and self._heap[0][0] <= now:
+            _, href = heapq.heappop(self._heap)
+            due.append(href)
+            conf = db_data.get(href)
+            if conf is None:
+                self._entries.pop(href, None)
+            else:
+                self._push(href, conf, now)
+        return due
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ScheduleDaemon:
+    """Runs ScheduleEngine.check() exactly at schedule boundaries.
+
+    Between transitions only a cheap stat() of the DB file is made. Every
+    `events_interval` seconds the PCE events feed is read, so a scheduled rule
+    toggled manually in the PCE console is reconciled right away; a full
+    check also runs every `audit_interval` seconds as a safety net.
+    """
+
+    # Seconds to pause after an unexpected error before the next iteration
+    ERROR_BACKOFF = 5
+
+    def __init__(self, engine: ScheduleEngine, audit_interval: int = 3600, db_poll_interval: int = 30,
+                 events_interval: int = 60):
+        self.engine: ScheduleEngine = engine
+        self.db: ScheduleDB = engine.db
+        self.pce: PCEClient = engine.pce
+        self.audit_interval: int = audit_interval
+        self.db_poll_interval: int = db_poll_interval
+        self.events_interval: int = events_interval
+        self.timeline: ScheduleTimeline = ScheduleTimeline()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def wake(self):
+        """Re-evaluate immediately (e.g. after an in-process schedule edit)"""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run_check(self, reason):
+        # Goes through the job registry so it never overlaps a check started from the GUI.
+        # A job that was already running began before this wake-up and may have
+        # evaluated the previous minute, so wait for it and run a fresh one.
+        requested = datetime.datetime.now()
+        job = self.engine.submit_check()
+        job.wait()
+        if job.started_at < requested:
+            job = self.engine.submit_check()
+            job.wait()
+        if job.status == 'failed':
+            print(f"[DAEMON ERROR] ({reason}) {job.error}")
+
+    def _poll_out_of_band(self, db_data):
+        """Scheduled hrefs changed outside the scheduler since the last poll"""
+        try:
+            changed = self.pce.poll_changes()
+        except Exception as e:
+            print(f"[DAEMON ERROR] (events) {e}")
+            return []
+        if changed is None:
+            return list(db_data)
+        return [h for h in db_data if h.replace('/active/', '/draft/') in changed]
+
+    def _snapshot(self):
+        # A copy: with --gui --scheduler, request threads put()/delete() into the same dict
+        return dict(self.db.get_all())
+
+    def run_forever(self):
+        self.db.load()
+        self.timeline.sync(self._snapshot(), datetime.datetime.now())
+        if self.events_interval > 0:
+            self._poll_out_of_band({})
+        self._run_check('startup')
+        last_audit = datetime.datetime.now()
+        last_events = last_audit
+
+        while not self._stop.is_set():
+            now = datetime.datetime.now()
+            audit_at = last_audit + datetime.timedelta(seconds=self.audit_interval)
+            next_at = self.timeline.peek()
+            wake_at = min(next_at, audit_at) if next_at else audit_at
+            if self.events_interval > 0:
+                wake_at = min(wake_at, last_events + datetime.timedelta(seconds=self.events_interval))
+            timeout = min(max((wake_at - now).total_seconds(), 0), self.db_poll_interval)
+
+            woken = self._wake.wait(timeout)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+
+            try:
+                now = datetime.datetime.now()
+                self.db.reload_if_changed()
+                db_data = self._snapshot()
+                changed = self.timeline.sync(db_data, now)
+                due = self.timeline.pop_due(db_data, now)
+                drifted = []
+                if self.events_interval > 0 and (now - last_events).total_seconds() >= self.events_interval:
+                    drifted = self._poll_out_of_band(db_data)
+                    last_events = now
+
+                if due or changed or woken or drifted or now >= audit_at:
+                    if due:
+                        reason = 'transition'
+                    elif changed or woken:
+                        reason = 'schedule change'
+                    elif drifted:
+                        reason = 'out-of-band change'
+                        print(f"{Colors.YELLOW}[DRIFT] {len(drifted)} 筆排程項目於 PCE 被手動變更，重新套用排程。{Colors.RESET}", flush=True)
+                    else:
+                        reason = 'drift audit'
+                    self._run_check(reason)
+                    last_audit = now
+                    # check() removes expired one_time entries from the DB
+                    self.timeline.sync(self._snapshot(), datetime.datetime.now())
+            except Exception as e:
+                # Keep enforcing: one failed iteration must not end the daemon
+                print(f"[DAEMON ERROR] {e}", flush=True)
+                self._stop.wait(self.ERROR_BACKOFF)
@@ -2,14 +2,83 @@
 Illumio Rule Scheduler — Flask Web GUI (Dark Theme)
 Optional dependency: pip install flask
 """
+import io
 import json
-import re
 import threading
 import webbrowser
+from collections import OrderedDict
 from datetime import datetime
-from src.core import truncate, extract_id
+from src.core import truncate, extract_id, RulesetSearchIndex
+from src.bulk import build_schedule, iter_import_rows, import_schedules, delete_schedules
 import src.i18n as i18n
 
+# RuleSets whose rendered detail rows are kept in memory
+DETAIL_CACHE_SIZE = 64
+# Seconds between SSE keep-alive comments on an idle /api/events stream
+SSE_KEEPALIVE = 15
+
+
+def _render_rule_rows(pce, rs):
+    """Detail rows of a RuleSet (without the schedule markers, which change independently)"""
+    rs_href = rs['href']
+    rs_ut = rs.get('update_type')
+    rows = [{
+        'href': rs_href,
+        'id': extract_id(rs_href),
+        'desc': '▶ [ENTIRE RULESET]',
+        'enabled': rs.get('enabled', False),
+        'src': 'NA', 'dst': 'NA', 'svc': 'NA',
+        'is_ruleset': True,
+        'prov': 'draft' if rs_ut else 'active',
+    }]
+    for r in rs.get('rules', []):
+        href = r['href']
+        src = pce.resolve_actor_str(r.get('destinations', r.get('consumers', [])))
+        dst = pce.resolve_actor_str(r.get('providers', []))
+        svc = pce.resolve_service_str(r.get('ingress_services', []))
+        r_ut = r.get('update_type', rs_ut)  # rules inherit RS provision if no own field
+        rows.append({
+            'href': href,
+            'id': extract_id(href),
+            'desc': truncate(r.get('description'), 50),
+            'desc_full': r.get('description', ''),
+            'enabled': r.get('enabled', False),
+            'src': truncate(src, 30), 'dst': truncate(dst, 30), 'svc': truncate(svc, 25),
+            'src_full': src, 'dst_full': dst, 'svc_full': svc,
+            'is_ruleset': False,
+            'prov': 'draft' if r_ut else 'active',
+        })
+    return rows
+
+
+def _schedule_row(href, c, live):
+    """One /api/schedules row built from the stored schedule and its live PCE object"""
+    is_rs = c.get('is_ruleset', False)
+    enabled_status = live.get('enabled', False) if live is not None else 'NA'
+    entry = {
+        'href': href,
+        'id': extract_id(href),
+        'type': 'RS' if is_rs else 'Rule',
+        'rs_name': c.get('detail_rs', 'Unknown'),
+        'name': c.get('detail_name', c.get('name', '')),
+        'src': 'NA' if is_rs else c.get('detail_src', 'All'),
+        'dst': 'NA' if is_rs else c.get('detail_dst', 'All'),
+        'svc': 'NA' if is_rs else c.get('detail_svc', 'All'),
+        'src_full': 'NA' if is_rs else c.get('detail_src_full', c.get('detail_src', 'All')),
+        'dst_full': 'NA' if is_rs else c.get('detail_dst_full', c.get('detail_dst', 'All')),
+        'svc_full': 'NA' if is_rs else c.get('detail_svc_full', c.get('detail_svc', 'All')),
+        'enabled': enabled_status,
+    }
+    if c.get('type') == 'recurring':
+        entry['action'] = 'ENABLE' if c.get('action') == 'allow' else 'DISABLE'
+        days = c.get('days', [])
+        d_str = 'Everyday' if len(days) == 7 else ','.join([d[:3] for d in days])
+        entry['timing'] = f"{d_str} {c.get('start','')}-{c.get('end','')}"
+    else:
+        entry['action'] = 'EXPIRE'
+        entry['timing'] = c.get('expire_at', '').replace('T', ' ')
+    return entry
+
 # ==========================================
 # Flask App Factory
 # ==========================================
@@ -21,6 +90,40 @@ def create_app(core_system):
     db = core_system['db']
     pce = core_system['pce']
     engine = core_system['engine']
+    # Embedded schedule daemon (--gui --scheduler), woken right after schedule edits
+    daemon = core_system.get('daemon')
+
+    def schedules_changed(action, hrefs):
+        engine.activity.publish('schedule', action=action, hrefs=hrefs)
+        if daemon is not None:
+            daemon.wake()
+
+    # Rendered detail rows per RuleSet href: (version, label cache, referenced names, rows).
+    # The version is the RuleSet's ETag (updated_at without one); a label cache refresh
+    # only invalidates rows whose referenced names actually changed.
+    detail_cache = OrderedDict()
+    detail_lock = threading.Lock()
+
+    def rendered_rows(rs):
+        labels = pce.label_cache
+        version = pce.ruleset_version(rs)
+        with detail_lock:
+            entry = detail_cache.get(rs['href'])
+            if entry and version and entry[0] == version:
+                if entry[1] is not labels and any(labels.get(h) != name for h, name in entry[2].items()):
+                    entry = None
+                if entry:
+                    detail_cache[rs['href']] = (version, labels, entry[2], entry[3])
+                    detail_cache.move_to_end(rs['href'])
+                    return entry[3]
+        rows = _render_rule_rows(pce, rs)
+        refs = {h: labels.get(h) for h in RulesetSearchIndex.ref_hrefs(rs)}
+        with detail_lock:
+            detail_cache[rs['href']] = (version, labels, refs, rows)
+            detail_cache.move_to_end(rs['href'])
+            while len(detail_cache) > DETAIL_CACHE_SIZE:
+                detail_cache.popitem(last=False)
+        return rows
 
     # ── Serve SPA ──
     @app.route('/')
@@ -36,7 +139,8 @@ def create_app(core_system):
         if kw:
             rs_list = pce.search_rulesets(kw)
         else:
-            rs_list = pce.get_all_rulesets(force_refresh=True)
+            # Served from the shared snapshot; ?refresh=1 forces a reload from the PCE
+            rs_list = pce.get_rulesets_snapshot(force=request.args.get('refresh') == '1')
         total = len(rs_list)
         start = (page - 1) * size
         end = start + size
@@ -60,86 +164,62 @@ def create_app(core_system):
 
     @app.route('/api/rulesets/<rs_id>')
     def api_ruleset_detail(rs_id):
-        pce.update_label_cache(silent=True)
+        pce.refresh_label_cache_async()
         rs = pce.get_ruleset_by_id(rs_id)
         if not rs:
             return jsonify({'error': 'Not found'}), 404
-        rules = []
         rs_href = rs['href']
-        rs_ut = rs.get('update_type')
-        rs_prov = 'draft' if rs_ut else 'active'
-        # RuleSet self row
-        rules.append({
-            'href': rs_href,
-            'id': extract_id(rs_href),
-            'desc': '▶ [ENTIRE RULESET]',
-            'enabled': rs.get('enabled', False),
-            'src': 'NA', 'dst': 'NA', 'svc': 'NA',
-            'sch': 'star' if rs_href in db.get_all() else '',
-            'is_ruleset': True,
-            'prov': rs_prov,
-        })
-        for r in rs.get('rules', []):
-            href = r['href']
-            dest = r.get('destinations', r.get('consumers', []))
-            r_ut = r.get('update_type', rs_ut)  # rules inherit RS provision if no own field
-            r_prov = 'draft' if r_ut else 'active'
-            rules.append({
-                'href': href,
-                'id': extract_id(href),
-                'desc': truncate(r.get('description'), 50),
-                'desc_full': r.get('description', ''),
-                'enabled': r.get('enabled', False),
-                'src': truncate(pce.resolve_actor_str(dest), 30),
-                'dst': truncate(pce.resolve_actor_str(r.get('providers', [])), 30),
-                'svc': truncate(pce.resolve_service_str(r.get('ingress_services', [])), 25),
-                'src_full': pce.resolve_actor_str(dest),
-                'dst_full': pce.resolve_actor_str(r.get('providers', [])),
-                'svc_full': pce.resolve_service_str(r.get('ingress_services', [])),
-                'sch': 'star' if href in db.get_all() else '',
-                'is_ruleset': False,
-                'prov': r_prov,
-            })
-        return jsonify({'name': rs['name'], 'href': rs_href, 'rules': rules})
+        # Schedule markers are sent as a list and applied client-side, so cached rows stay shared
+        scheduled = db.children_of(rs_href) + ([rs_href] if rs_href in db.get_all() else [])
+        return jsonify({'name': rs['name'], 'href': rs_href, 'rules': rendered_rows(rs), 'scheduled': scheduled})
 
     # ── Schedules ──
     @app.route('/api/schedules')
     def api_schedules():
-        data = db.get_all()
-        result = []
-        core = app.config.get('CORE')
-        for href, c in data.items():
-            is_rs = c.get('is_ruleset', False)
-            
-            enabled_status = 'NA'
-            res = pce.get_live_item(href)
-            if res and res.status_code == 200:
-                enabled_status = res.json().get('enabled', False)
-            
-            entry = {
-                'href': href,
-                'id': extract_id(href),
-                'type': 'RS' if is_rs else 'Rule',
-                'rs_name': c.get('detail_rs', 'Unknown'),
-                'name': c.get('detail_name', c.get('name', '')),
-                'src': 'NA' if is_rs else c.get('detail_src', 'All'),
-                'dst': 'NA' if is_rs else c.get('detail_dst', 'All'),
-                'svc': 'NA' if is_rs else c.get('detail_svc', 'All'),
-                'src_full': 'NA' if is_rs else c.get('detail_src_full', c.get('detail_src', 'All')),
-                'dst_full': 'NA' if is_rs else c.get('detail_dst_full', c.get('detail_dst', 'All')),
-                'svc_full': 'NA' if is_rs else c.get('detail_svc_full', c.get('detail_svc', 'All')),
-                'enabled': enabled_status,
-            }
-            if c.get('type') == 'recurring':
-                entry['action'] = 'ENABLE' if c.get('action') == 'allow' else 'DISABLE'
-                days = c.get('days', [])
-                d_str = 'Everyday' if len(days) == 7 else ','.join([d[:3] for d in days])
-                entry['timing'] = f"{d_str} {c.get('start','')}-{c.get('end','')}"
-            else:
-                entry['action'] = 'EXPIRE'
-                entry['timing'] = c.get('expire_at', '').replace('T', ' ')
-            result.append(entry)
-        return jsonify(result)
+        """Paginated schedule list.
+
+        Query: page, size, q (name / RuleSet / ID text), rs (RuleSet href or name),
+        type (RS|Rule), action (ENABLE|DISABLE|EXPIRE), sort (any row field), order (asc|desc).
+        """
+        data = dict(db.get_all())  # the engine thread and other requests may edit it meanwhile
+        args = request.args
+        page = max(int(args.get('page', 1)), 1)
+        size = max(int(args.get('size', 50)), 1)
+        q = args.get('q', '').strip().lower()
+        rs_filter = args.get('rs', '').strip()
+        type_filter = args.get('type', '')
+        action_filter = args.get('action', '')
+
+        hrefs = list(data.keys())
+        if rs_filter.startswith('/orgs/'):
+            hrefs = [h for h in db.children_of(rs_filter) + [rs_filter] if h in data]
+        # Live state comes from a short-lived shared snapshot (one bulk fetch, not one GET per row)
+        snapshot = pce.get_live_snapshot_cached(data.keys()) if data else None
+        live_state = pce.lookup_live_many(hrefs, snapshot)
+
+        rows = []
+        for href in hrefs:
+            entry = _schedule_row(href, data[href], live_state[href][0])
+            if type_filter and entry['type'] != type_filter:
+                continue
+            if action_filter and entry['action'] != action_filter:
+                continue
+            if rs_filter and not rs_filter.startswith('/orgs/') and entry['rs_name'] != rs_filter:
+                continue
+            if q and not any(q in str(entry[k]).lower() for k in ('name', 'rs_name', 'id')):
+                continue
+            rows.append(entry)
+
+        sort_key = args.get('sort', '')
+        if rows and sort_key in rows[0]:
+            def key(e):
+                v = str(e[sort_key])
+                return (0, int(v), '') if v.isdigit() else (1, 0, v.lower())
+            rows.sort(key=key, reverse=args.get('order') == 'desc')
+        total = len(rows)
+        start = (page - 1) * size
+        return jsonify({'items': rows[start:start + size], 'total': total, 'page': page, 'size': size,
+                        'pages': (total + size - 1) // size})
 
     @app.route('/api/schedules', methods=['POST'])
     def api_schedule_create():
@@ -148,52 +228,36 @@ def create_app(core_system):
         if not href:
             return jsonify({'error': 'href is required'}), 400
 
-        db_entry = {
-            'name': d.get('name', ''),
-            'is_ruleset': d.get('is_ruleset', False),
-            'detail_rs': d.get('detail_rs', ''),
-            'detail_src': d.get('detail_src', 'All'),
-            'detail_dst': d.get('detail_dst', 'All'),
-            'detail_svc': d.get('detail_svc', 'All'),
-            'detail_name': d.get('name', ''),
-            'detail_src_full': d.get('detail_src_full', d.get('detail_src', 'All')),
-            'detail_dst_full': d.get('detail_dst_full', d.get('detail_dst', 'All')),
-            'detail_svc_full': d.get('detail_svc_full', d.get('detail_svc', 'All')),
-        }
-
         try:
-            if d.get('schedule_type') == 'recurring':
-                days = [x.strip() for x in d.get('days', '').split(',')]
-                from datetime import datetime
-                t1 = datetime.strptime(d.get('start', ''), '%H:%M')
-                t2 = datetime.strptime(d.get('end', ''), '%H:%M')
-                if t1 >= t2:
-                    raise ValueError(i18n.t('sch_time_invalid'))
-                
-                db_entry.update({
-                    'type': 'recurring',
-                    'action': d.get('action', 'allow'),
-                    'days': days,
-                    'start': d.get('start'),
-                    'end': d.get('end'),
-                })
-                act_str = i18n.t('action_enable_in_window') if d.get('action') == 'allow' else i18n.t('action_disable_in_window')
-                days_str = i18n.t('action_everyday') if len(days) == 7 else ','.join([dx[:3] for dx in days])
-                note_msg = f"[📅 {i18n.t('sch_tag_recurring')}: {days_str} {db_entry['start']}-{db_entry['end']} {act_str}]"
-            else:
-                from datetime import datetime
-                ex = d.get('expire_at', '').replace(' ', 'T')
-                if len(ex) == 16: ex += ":00Z"
-                datetime.fromisoformat(ex.replace("Z", "+00:00"))
-                db_entry.update({'type': 'one_time', 'action': 'allow', 'expire_at': ex})
-                note_msg = f"[⏳ {i18n.t('sch_tag_expire')}: {d.get('expire_at')}]"
+            db_entry, note_msg = build_schedule(d)
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
 
-        db.put(href, db_entry)
+        with db.acting_as(f"gui:{request.remote_addr}"):
+            db.put(href, db_entry)
+        schedules_changed('saved', [href])
         pce.update_rule_note(href, note_msg)
         return jsonify({'ok': True, 'message': i18n.t('sch_updated')})
 
+    @app.route('/api/schedules/import', methods=['POST'])
+    def api_schedule_import():
+        """Bulk create/replace schedules from a JSON list or a CSV / JSON Lines body.
+
+        Rows are validated as they are read; valid ones are saved in one DB write
+        and provisioned together. ?dry_run=1 only validates.
+        """
+        payload = request.get_json(silent=True)
+        if payload is not None:
+            items = payload.get('items', []) if isinstance(payload, dict) else payload
+            rows = enumerate(items, 1)
+        else:
+            rows = iter_import_rows(io.TextIOWrapper(request.stream, encoding='utf-8-sig'))
+        summary = import_schedules(db, pce, rows, actor=f"gui:{request.remote_addr}",
+                                   dry_run=request.args.get('dry_run') == '1')
+        if summary['imported']:
+            schedules_changed('saved', [r['href'] for r in summary['results']])
+        return jsonify(summary)
+
     @app.route('/api/schedules/<path:href>', methods=['GET'])
     def api_schedule_get(href):
         href = f"/{href}"
@@ -208,23 +272,51 @@ def create_app(core_system):
         hrefs = d.get('hrefs', [])
         if not hrefs:
             return jsonify({'error': 'No hrefs provided'}), 400
-        count = 0
-        for href in hrefs:
-            try:
-                pce.update_rule_note(href, '', remove=True)
-            except Exception:
-                pass
-            db.delete(href)
-            count += 1
-        return jsonify({'ok': True, 'count': count})
+        results = delete_schedules(db, pce, hrefs, actor=f"gui:{request.remote_addr}")
+        deleted = [r['href'] for r in results if r['deleted']]
+        schedules_changed('deleted', deleted)
+        return jsonify({'ok': True, 'count': len(deleted), 'results': results})
 
     # ── Check ──
     @app.route('/api/check', methods=['POST'])
     def api_check():
-        logs = engine.check(silent=True)
-        ansi_re = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-        clean_logs = [ansi_re.sub('', l) for l in logs]
-        return jsonify({'logs': clean_logs})
+        # Runs in the background; a check already running for this PCE is joined instead
+        job = engine.submit_check()
+        return jsonify({'job': job.to_dict()}), 202
+
+    @app.route('/api/check/<job_id>')
+    def api_check_status(job_id):
+        job = engine.get_job(job_id)
+        if not job:
+            return jsonify({'error': 'Not found'}), 404
+        return jsonify({'job': job.to_dict(with_logs=job.status != 'running')})
+
+    # ── Live activity (Server-Sent Events) ──
+    @app.route('/api/events')
+    def api_events():
+        activity = engine.activity
+        last = request.headers.get('Last-Event-ID') or request.args.get('since')
+        last_id = int(last) if last and last.isdigit() else activity.last_id
+
+        def stream():
+            nonlocal last_id
+            yield "retry: 3000\n\n"
+            while True:
+                events = activity.wait(last_id, timeout=SSE_KEEPALIVE)
+                if not events:
+                    yield ": keep-alive\n\n"
+                    continue
+                for e in events:
+                    last_id = e['id']
+                    yield f"id: {e['id']}\nevent: {e['type']}\ndata: {json.dumps(e, ensure_ascii=False)}\n\n"
+
+        return Response(stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    # ── Stats ──
+    @app.route('/api/stats')
+    def api_stats():
+        return jsonify({'connections': pce.connection_stats(), 'cache': dict(pce.cache_stats)})
 
     # ── Config ──
     @app.route('/api/config', methods=['GET'])
@@ -253,7 +345,7 @@ def create_app(core_system):
         if 'lang' in d:
             i18n.set_lang(d['lang'])
             cfg.save_lang(d['lang'])
-        pce.update_label_cache(silent=True)
+        pce.update_label_cache(silent=True, force=True)
         return jsonify({'ok': True, 'message': 'Configuration saved!'})
 
     # ── Stop ──
@@ -280,8 +372,15 @@ def launch_gui(core_system, port=5000):
     browser_url = f'http://localhost:{port}'
     print(f"[WebGUI] Starting at {url}")
     print(f"[WebGUI] Press Ctrl+C to stop")
+    daemon = core_system.get('daemon')
+    if daemon is not None:
+        threading.Thread(target=daemon.run_forever, name="schedule-daemon", daemon=True).start()
     threading.Timer(1.0, lambda: webbrowser.open(browser_url)).start()
-    app.run(host=host, port=port, debug=False, use_reloader=False)
+    try:
+        app.run(host=host, port=port, debug=False, use_reloader=False)
+    finally:
+        if daemon is not None:
+            daemon.stop()
 
 
 # ==========================================
@@ -716,17 +815,23 @@ tr.selected { background: #C2E2F0 !important; }
   <div class="toolbar">
     <button class="btn" onclick="loadSchedules()">{{ t('gui_sch_refresh') }}</button>
     <button class="btn btn-danger" onclick="deleteSelectedSchedules()">{{ t('gui_sch_delete') }}</button>
+    <button class="btn" onclick="document.getElementById('sch-import-file').click()">{{ t('gui_sch_import') }}</button>
+    <input type="file" id="sch-import-file" accept=".csv,.json,.jsonl" style="display:none" onchange="importSchedules(this)">
+    <input type="text" id="sch-filter" placeholder="{{ t('gui_sch_filter_ph') }}" onkeypress="if(event.key==='Enter') loadSchedules(1)" style="flex:1" />
+    <select id="sch-filter-type" onchange="loadSchedules(1)"><option value="">{{ t('gui_sch_all_types') }}</option><option value="RS">RS</option><option value="Rule">Rule</option></select>
+    <select id="sch-filter-action" onchange="loadSchedules(1)"><option value="">{{ t('gui_sch_all_actions') }}</option><option value="ENABLE">ENABLE</option><option value="DISABLE">DISABLE</option><option value="EXPIRE">EXPIRE</option></select>
   </div>
   <div class="table-wrap">
-    <table><thead><tr><th style="width:36px"><input type="checkbox" id="sch-select-all" onchange="toggleSchSelectAll(this)"></th><th style="width:50px">{{ t('gui_sch_th_type') }}</th><th style="width:70px">{{ t('gui_browse_th_status') }}</th><th>{{ t('gui_sch_th_rs') }}</th><th>{{ t('gui_sch_th_desc') }}</th><th>{{ t('gui_browse_th_src') }}</th><th>{{ t('gui_browse_th_dest') }}</th><th>{{ t('gui_browse_th_svc') }}</th><th style="width:70px">{{ t('gui_sch_th_action') }}</th><th>{{ t('gui_sch_th_timing') }}</th><th style="width:60px">ID</th></tr></thead>
+    <table><thead><tr><th style="width:36px"><input type="checkbox" id="sch-select-all" onchange="toggleSchSelectAll(this)"></th><th style="width:50px;cursor:pointer" onclick="sortSchedules('type')">{{ t('gui_sch_th_type') }}</th><th style="width:70px;cursor:pointer" onclick="sortSchedules('enabled')">{{ t('gui_browse_th_status') }}</th><th style="cursor:pointer" onclick="sortSchedules('rs_name')">{{ t('gui_sch_th_rs') }}</th><th style="cursor:pointer" onclick="sortSchedules('name')">{{ t('gui_sch_th_desc') }}</th><th>{{ t('gui_browse_th_src') }}</th><th>{{ t('gui_browse_th_dest') }}</th><th>{{ t('gui_browse_th_svc') }}</th><th style="width:70px;cursor:pointer" onclick="sortSchedules('action')">{{ t('gui_sch_th_action') }}</th><th style="cursor:pointer" onclick="sortSchedules('timing')">{{ t('gui_sch_th_timing') }}</th><th style="width:60px;cursor:pointer" onclick="sortSchedules('id')">ID</th></tr></thead>
     <tbody id="sch-table"></tbody></table>
   </div>
+  <div class="pagination" id="sch-pagination" style="margin-top:12px"></div>
 </div>
 
 <!-- ━━━ Logs Tab ━━━ -->
 <div id="tab-logs" class="tab-panel">
   <div class="toolbar">
-    <button class="btn btn-accent" onclick="runCheck()">{{ t('gui_logs_run') }}</button>
+    <button class="btn btn-accent" id="check-btn" onclick="runCheck()">{{ t('gui_logs_run') }}</button>
     <button class="btn" onclick="document.getElementById('log-panel').textContent=''">{{ t('gui_logs_clear') }}</button>
   </div>
   <div class="log-panel" id="log-panel">{{ t('gui_logs_ready') }}\n</div>
@@ -838,17 +943,21 @@ function provBadge(prov) {
 }
 
 // ━━━ RuleSets (paginated) ━━━
-async function loadAllRS(page) {
+async function loadAllRS(page, refresh) {
   currentSearch = '';
   currentPage = page || 1;
   try {
-    const res = await fetch(`/api/rulesets?page=${currentPage}&size=50`);
+    const res = await fetch(`/api/rulesets?page=${currentPage}&size=50` + (refresh ? '&refresh=1' : ''));
     const data = await res.json();
     renderRS(data);
   } catch(e) { toast('Failed to load RuleSets: ' + e.message, 'error'); }
 }
+function clearRS() {
+  document.getElementById('rs-search-input').value = '';
+  loadAllRS(1, true);
+}
 async function searchRS() {
-  currentSearch = document.getElementById('search-input').value;
+  currentSearch = document.getElementById('rs-search-input').value;
   currentPage = 1;
   try {
     const res = await fetch(`/api/rulesets?q=${encodeURIComponent(currentSearch)}&page=1&size=50`);
@@ -906,6 +1015,8 @@ async function selectRS(rs, tr) {
   try {
     const res = await fetch('/api/rulesets/' + rs.id);
     const data = await res.json();
+    const scheduled = new Set(data.scheduled || []);
+    data.rules.forEach(r => r.sch = scheduled.has(r.href) ? 'star' : '');
     document.getElementById('rules-title').textContent = `${data.name} (${data.rules.length} items)`;
     renderRules(data.rules, rs.name);
   } catch(e) { toast('Failed to load rules: ' + e.message, 'error'); }
@@ -1021,14 +1132,25 @@ async function saveSchedule() {
 }
 
 // ━━━ Schedules List (with checkboxes) ━━━
-async function loadSchedules() {
+let schPage = 1, schSort = '', schOrder = 'asc';
+function sortSchedules(field) {
+  if (schSort === field) schOrder = schOrder === 'asc' ? 'desc' : 'asc';
+  else { schSort = field; schOrder = 'asc'; }
+  loadSchedules(1);
+}
+async function loadSchedules(page) {
+  if (page) schPage = page;
   try {
-    const res = await fetch('/api/schedules');
+    const params = new URLSearchParams({page: schPage, size: 50, sort: schSort, order: schOrder,
+      q: document.getElementById('sch-filter').value,
+      type: document.getElementById('sch-filter-type').value,
+      action: document.getElementById('sch-filter-action').value});
+    const res = await fetch('/api/schedules?' + params);
     const data = await res.json();
     const tb = document.getElementById('sch-table');
     tb.innerHTML = '';
     document.getElementById('sch-select-all').checked = false;
-    data.forEach(s => {
+    data.items.forEach(s => {
       const tr = document.createElement('tr');
       const hasSrc = s.src && s.src !== 'NA';
       const hasDst = s.dst && s.dst !== 'NA';
@@ -1059,6 +1181,24 @@ async function loadSchedules() {
       });
       tb.appendChild(tr);
     });
+    const pg = document.getElementById('sch-pagination');
+    pg.innerHTML = '';
+    if (data.pages > 1) {
+      const prev = document.createElement('button');
+      prev.textContent = '◀ Prev';
+      prev.disabled = data.page <= 1;
+      prev.onclick = () => loadSchedules(data.page - 1);
+      pg.appendChild(prev);
+      const info = document.createElement('span');
+      info.className = 'page-info';
+      info.textContent = `Page ${data.page} / ${data.pages} (${data.total})`;
+      pg.appendChild(info);
+      const next = document.createElement('button');
+      next.textContent = 'Next ▶';
+      next.disabled = data.page >= data.pages;
+      next.onclick = () => loadSchedules(data.page + 1);
+      pg.appendChild(next);
+    }
   } catch(e) { toast('Failed: ' + e.message, 'error'); }
 }
 
@@ -1110,23 +1250,82 @@ async function deleteSelectedSchedules() {
   try {
     const res = await fetch('/api/schedules/delete', { method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({hrefs}) });
     const data = await res.json();
-    if (data.ok) { toast(`${data.count} schedule(s) deleted.`); loadSchedules(); }
+    if (data.ok) {
+      const notFound = data.results.filter(r => !r.deleted).length;
+      const noteFailed = data.results.filter(r => r.deleted && !r.note);
+      toast(`${data.count} schedule(s) deleted.` + (notFound ? ` ${notFound} not found.` : '') + (noteFailed.length ? ` Note removal failed for ID ${noteFailed.map(r => r.id).join(', ')}.` : ''),
+            notFound || noteFailed.length ? 'error' : undefined);
+      loadSchedules();
+    }
     else toast(data.error || 'Failed', 'error');
   } catch(e) { toast('Error: ' + e.message, 'error'); }
 }
 
+async function importSchedules(input) {
+  const file = input.files[0];
+  input.value = '';
+  if (!file) return;
+  try {
+    const type = file.name.toLowerCase().endsWith('.csv') ? 'text/csv' : 'text/plain';
+    const res = await fetch('/api/schedules/import', { method:'POST', headers:{'Content-Type': type}, body: await file.text() });
+    const data = await res.json();
+    if (data.error) { toast(data.error, 'error'); return; }
+    const failedNotes = data.results.filter(r => r.note === false).length;
+    toast(`${data.imported} schedule(s) imported, ${data.errors.length} rejected` + (failedNotes ? `, ${failedNotes} note update(s) failed` : ''),
+          data.errors.length || failedNotes ? 'error' : undefined);
+    data.errors.slice(0, 20).forEach(e => appendLog(`[IMPORT] row ${e.row} ${e.href || ''}: ${e.error}`));
+    loadSchedules(1);
+  } catch(e) { toast('Error: ' + e.message, 'error'); }
+}
+
 // ━━━ Logs & Check ━━━
-async function runCheck() {
+let activitySource = null;
+const checkBtnLabel = `{{ t('gui_logs_run') }}`;
+let scheduleReload = null;
+function appendLog(line) {
   const panel = document.getElementById('log-panel');
+  panel.textContent += line + '\n';
+  panel.scrollTop = panel.scrollHeight;
+}
+function subscribeActivity() {
+  if (!window.EventSource) return;
+  activitySource = new EventSource('/api/events');
+  activitySource.addEventListener('log', e => appendLog(JSON.parse(e.data).msg));
+  activitySource.addEventListener('check', e => {
+    if (JSON.parse(e.data).phase === 'done') appendLog('✔ Check complete.\n');
+  });
+  activitySource.addEventListener('provision', e => {
+    const ev = JSON.parse(e.data);
+    if (!ev.ok) toast(`Provision failed (RuleSet ${ev.rs_href.split('/').pop()})`, 'error');
+  });
+  // Engine toggles and schedule edits from other sessions refresh the schedule list
+  ['state', 'schedule'].forEach(kind => activitySource.addEventListener(kind, () => {
+    if (!document.getElementById('tab-schedules').classList.contains('active')) return;
+    clearTimeout(scheduleReload);
+    scheduleReload = setTimeout(loadSchedules, 500);
+  }));
+}
+async function runCheck() {
   const now = new Date().toLocaleTimeString();
-  panel.textContent += `[${now}] Starting policy check...\n`;
+  appendLog(`[${now}] Starting policy check...`);
   try {
     const res = await fetch('/api/check', {method:'POST'});
-    const data = await res.json();
-    data.logs.forEach(l => panel.textContent += l + '\n');
-    panel.textContent += '✔ Check complete.\n\n';
-    panel.scrollTop = panel.scrollHeight;
-  } catch(e) { panel.textContent += 'Error: ' + e.message + '\n'; }
+    let job = (await res.json()).job;
+    const btn = document.getElementById('check-btn');
+    while (job.status === 'running') {
+      const p = job.progress;
+      btn.textContent = `${p.evaluated || 0}/${p.total || 0} · ${p.toggled || 0} toggled · ${p.provisioned || 0} provisioned`;
+      await new Promise(r => setTimeout(r, 1000));
+      job = (await (await fetch('/api/check/' + job.id)).json()).job;
+    }
+    btn.textContent = checkBtnLabel;
+    if (job.status === 'failed') appendLog('Error: ' + job.error);
+    // With a live stream the lines have already been shown as they happened
+    else if (!activitySource || activitySource.readyState !== EventSource.OPEN) {
+      job.logs.forEach(l => appendLog(l));
+      appendLog('✔ Check complete.\n');
+    }
+  } catch(e) { appendLog('Error: ' + e.message); }
 }
 
 // ━━━ Settings ━━━
@@ -1238,6 +1437,7 @@ document.addEventListener('DOMContentLoaded', () => {
   const themeSelect = document.getElementById('cfg-theme');
   if (themeSelect) themeSelect.value = savedTheme;
   loadAllRS(); 
+  subscribeActivity();
 });
 
 </script>
@@ -45,6 +45,11 @@ _STRINGS = {
         'sch_edit': 'Edit schedule',
         'sch_delete': 'Delete schedule',
         'sch_back': 'Back to main menu',
+        'sch_history': 'Change history',
+        'history_title': 'Schedule change history (newest last)',
+        'history_empty': 'No recorded changes.',
+        'history_unavailable': 'Change history requires "db_backend": "journal" in config.json.',
+        'press_enter': 'Press Enter to continue...',
         
         # Browse
         'browse_title': 'Browse & Add Schedule (q to return)',
@@ -118,6 +123,7 @@ _STRINGS = {
         'delete_target': 'Target:',
         'delete_cleaning': 'Cleaning up note...',
         'delete_done': 'Schedule deleted.',
+        'delete_note_failed': 'Could not remove the schedule note from the rule description.',
         'delete_not_found': 'ID not found.',
         
         # Config
@@ -183,11 +189,15 @@ _STRINGS = {
         'gui_browse_th_svc': 'SERVICE',
         'gui_sch_refresh': '↻ Refresh',
         'gui_sch_delete': '🗑 Delete Selected',
+        'gui_sch_import': '⇪ Import CSV/JSON',
         'gui_sch_th_type': 'Type',
         'gui_sch_th_rs': 'RuleSet',
         'gui_sch_th_desc': 'Description',
         'gui_sch_th_action': 'Action',
         'gui_sch_th_timing': 'Timing / Expires',
+        'gui_sch_filter_ph': 'Filter by name, RuleSet or ID...',
+        'gui_sch_all_types': 'All types',
+        'gui_sch_all_actions': 'All actions',
         'gui_logs_run': '▶ Run Manual Check',
         'gui_logs_clear': 'Clear',
         'gui_logs_ready': 'Ready. Click "Run Manual Check" to start.',
@@ -252,6 +262,11 @@ _STRINGS = {
         'sch_edit': '修改排程',
         'sch_delete': '刪除排程',
         'sch_back': '返回主選單',
+        'sch_history': '變更紀錄',
+        'history_title': '排程變更紀錄 (最新在後)',
+        'history_empty': '沒有任何變更紀錄。',
+        'history_unavailable': '變更紀錄需在 config.json 設定 "db_backend": "journal"。',
+        'press_enter': '按 Enter 繼續...',
         
         # Browse
         'browse_title': '瀏覽與新增排程 (輸入 q 返回)',
@@ -326,6 +341,7 @@ _STRINGS = {
         'delete_target': '目標:',
         'delete_cleaning': '嘗試清除 Note 標記...',
         'delete_done': '排程已刪除。',
+        'delete_note_failed': '無法從規則描述中移除排程註記。',
         'delete_not_found': '找不到該 ID。',
         
         # Config
@@ -391,11 +407,15 @@ _STRINGS = {
         'gui_browse_th_svc': '服務',
         'gui_sch_refresh': '↻ 重新整理',
         'gui_sch_delete': '🗑 刪除已選項目',
+        'gui_sch_import': '⇪ 匯入 CSV/JSON',
         'gui_sch_th_type': '類型',
         'gui_sch_th_rs': '規則集',
         'gui_sch_th_desc': '描述',
         'gui_sch_th_action': '行為',
         'gui_sch_th_timing': '時間 / 過期',
+        'gui_sch_filter_ph': '依名稱、規則集或 ID 篩選...',
+        'gui_sch_all_types': '所有類型',
+        'gui_sch_all_actions': '所有動作',
         'gui_logs_run': '▶ 立即執行檢查',
         'gui_logs_clear': '清除',
         'gui_logs_ready': '準備就緒。點擊「立即執行檢查」開始。',
@@ -0,0 +1,63 @@
+import io
+import json
+import random
+import unittest
+
+from src.core import iter_json_array
+
+
+class ChunkedStream(io.RawIOBase):
+    """Byte stream that returns reads of random small sizes, regardless of what is asked"""
+
+    def __init__(self, data, rng, max_chunk):
+        self._data, self._pos, self._rng, self._max = data, 0, rng, max_chunk
+
+    def read(self, size=-1):
+        n = self._rng.randint(1, self._max)
+        chunk = self._data[self._pos:self._pos + n]
+        self._pos += len(chunk)
+        return chunk
+
+
+class PartsStream(io.RawIOBase):
+    """Byte stream that returns the given parts one per read"""
+
+    def __init__(self, parts):
+        self._parts = list(parts)
+
+    def read(self, size=-1):
+        return self._parts.pop(0) if self._parts else b''
+
+
+class IterJsonArrayTest(unittest.TestCase):
+
+    def decode(self, text, rng, max_chunk):
+        return list(iter_json_array(ChunkedStream(text.encode('utf-8'), rng, max_chunk), chunk_size=max_chunk))
+
+    def test_scalars_split_at_buffer_edge(self):
+        values = [-2500.0, 1e5, -0.5e-3, 12345678901234567890, 0, True, False, None, "a,b]", 3.25]
+        text = json.dumps(values)
+        for cut in range(1, len(text)):
+            stream = PartsStream([text[:cut].encode(), text[cut:].encode()])
+            self.assertEqual(list(iter_json_array(stream, chunk_size=cut)), values, f"cut at {cut}")
+
+    def test_random_chunking(self):
+        rng = random.Random(1234)
+        for _ in range(500):
+            values = [rng.choice([rng.randint(-10**6, 10**6), rng.uniform(-1e4, 1e4), rng.random() * 1e-7,
+                                  "é✓" * rng.randint(0, 3), {"k": [1, 2.5, None]}, [], True, None])
+                      for _ in range(rng.randint(0, 12))]
+            text = json.dumps(values, separators=(',', ':') if rng.random() < 0.5 else (', ', ': '))
+            self.assertEqual(self.decode(text, rng, rng.randint(1, 9)), values, text)
+
+    def test_empty_and_malformed(self):
+        rng = random.Random(0)
+        self.assertEqual(self.decode(' [ ] ', rng, 2), [])
+        with self.assertRaises(ValueError):
+            self.decode('{"a": 1}', rng, 3)
+        with self.assertRaises(ValueError):
+            self.decode('[1 2]', rng, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()